@@ -1,23 +1,55 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
 import json
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
-from fastapi import APIRouter, HTTPException, Request
+import anyio.to_thread
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 
-from app.api.schemas import MetadataResponse, RecommendRequest, RecommendResponse
+from app.api.schemas import (
+    MetadataResponse,
+    RecommendBatchRequest,
+    RecommendBatchResponse,
+    RecommendKey,
+    RecommendRequest,
+    RecommendResponse,
+    recommend_key,
+)
 from app.core.cache import artifact_cache, response_cache
+from app.core.compression import EncodedPrefix, compress_variants, encode_prefix, negotiate_encoding
 from app.core.config import get_settings
-from app.ml.policy import recommend_policy
+from app.core.executor import ExecutorSaturated
+from app.core.metrics import metrics, render_family
+from app.core.response_store import response_store
+from app.core.serialization import dumps_bytes
+from app.ml.export_static_recommendations import build_recommendation_bundle
 
 router = APIRouter()
 
+_warmed_hashes: Set[str] = set()
+# (artifact_hash, encoded grid bodies); swapped wholesale so readers need no lock.
+_grid_state: Optional[Tuple[str, Dict[str, bytes]]] = None
+
+# Cached prefixes are bytes, or memoryviews into the shared response store.
+BodyPrefix = Union[bytes, memoryview]
+
+# Part of the shared store's scope, so a build with a different response shape never maps
+# bodies written by another.
+_RESPONSE_SCHEMA_FINGERPRINT = hashlib.sha256(
+    json.dumps(RecommendResponse.model_json_schema(), sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+RESPONSE_FIELDS = ("artifact_version", "method_used", "segments", "dose_response", "baseline", "warnings")
+
 
 def _get_artifacts() -> Any:
     settings = get_settings()
     try:
         return artifact_cache.get(settings.artifact_dir)
-    except FileNotFoundError as exc:
+    except (FileNotFoundError, ValueError) as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
 
 
@@ -26,10 +58,26 @@ def healthz() -> Dict[str, str]:
     return {"status": "ok"}
 
 
+async def _run_cold(request: Request, func: Callable[..., Any], *args: Any) -> Any:
+    try:
+        return await request.app.state.cold_executor.run(func, *args)
+    except ExecutorSaturated as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"}) from exc
+
+
+async def _get_artifacts_async(request: Request) -> Any:
+    """Loaded artifacts straight from the event loop; a cold load goes to the executor."""
+
+    artifacts = artifact_cache.peek(get_settings().artifact_dir)
+    if artifacts is not None:
+        return artifacts
+    return await _run_cold(request, _get_artifacts)
+
+
 @router.get("/api/v1/metadata", response_model=MetadataResponse)
-def metadata() -> MetadataResponse:
+async def metadata(request: Request) -> MetadataResponse:
     settings = get_settings()
-    artifacts = _get_artifacts()
+    artifacts = await _get_artifacts_async(request)
 
     return MetadataResponse(
         artifact_version=str(artifacts.manifest.get("artifact_version", "unknown")),
@@ -40,74 +88,416 @@ def metadata() -> MetadataResponse:
     )
 
 
-@router.post("/api/v1/recommend", response_model=RecommendResponse)
-def recommend(payload: RecommendRequest, request: Request) -> RecommendResponse:
-    artifacts = _get_artifacts()
+def _artifact_hash(artifacts: Any) -> str:
+    return str(artifacts.manifest.get("artifact_hash", "unknown"))
+
+
+def _store_scope(artifacts: Any) -> str:
+    return f"{_artifact_hash(artifacts)}-{_RESPONSE_SCHEMA_FINGERPRINT}"
 
-    requested_method = payload.method
-    method_used = requested_method
-    warnings = []
 
+def _resolve_method(artifacts: Any, requested_method: str) -> Tuple[str, List[str]]:
     if requested_method == "dr" and not artifacts.has_dr:
-        method_used = "naive"
-        warnings.append("DR artifacts unavailable; falling back to naive policy")
-
-    cache_key = json.dumps(
-        {
-            "objective": payload.objective,
-            "max_policy_level": payload.max_policy_level,
-            "segment_by": payload.segment_by,
-            "method": method_used,
-            "artifact_hash": artifacts.manifest.get("artifact_hash", "unknown"),
-        },
-        sort_keys=True,
-    )
+        return "naive", ["DR artifacts unavailable; falling back to naive policy"]
+    return requested_method, []
 
-    cached = response_cache.get(cache_key)
-    if cached is None:
-        try:
-            recommendation = recommend_policy(
-                dose_response=artifacts.dose_response,
-                objective=payload.objective,
-                max_policy_level=payload.max_policy_level,
-                segment_by=payload.segment_by,
+
+def _compute_recommendation(
+    artifacts: Any,
+    objective: str,
+    max_policy_level: int,
+    segment_by: str,
+    requested_method: str,
+) -> Dict[str, Any]:
+    """The response fields for one request; shared by `/recommend` and the grid."""
+
+    method_used, warnings = _resolve_method(artifacts, requested_method)
+    try:
+        recommendation = artifacts.policy_table.recommend(
+            objective=objective,
+            max_policy_level=max_policy_level,
+            segment_by=segment_by,
+            method=method_used,
+        )
+    except ValueError as exc:
+        if requested_method == "dr":
+            method_used = "naive"
+            warnings.append("DR policy unavailable for this slice; returning naive policy")
+            recommendation = artifacts.policy_table.recommend(
+                objective=objective,
+                max_policy_level=max_policy_level,
+                segment_by=segment_by,
                 method=method_used,
             )
-        except ValueError as exc:
-            if requested_method == "dr":
-                method_used = "naive"
-                warnings.append("DR policy unavailable for this slice; returning naive policy")
-                recommendation = recommend_policy(
-                    dose_response=artifacts.dose_response,
-                    objective=payload.objective,
-                    max_policy_level=payload.max_policy_level,
-                    segment_by=payload.segment_by,
-                    method=method_used,
-                )
-            else:
-                raise HTTPException(status_code=422, detail=str(exc)) from exc
-
-        cached = {
-            "artifact_version": str(artifacts.manifest.get("artifact_version", "unknown")),
-            "method_used": method_used,
-            "segments": recommendation["segments"],
-            "dose_response": recommendation["dose_response"],
-            "baseline": recommendation["baseline"],
-            "warnings": warnings,
-        }
-        response_cache.set(cache_key, cached)
-
-    merged_warnings = list(cached.get("warnings", []))
-    for warning in warnings:
-        if warning not in merged_warnings:
-            merged_warnings.append(warning)
-
-    return RecommendResponse(
-        artifact_version=str(cached["artifact_version"]),
-        method_used=str(cached["method_used"]),
-        segments=list(cached["segments"]),
-        dose_response=list(cached["dose_response"]),
-        baseline=cached["baseline"],
-        warnings=merged_warnings,
-        request_id=getattr(request.state, "request_id", None),
+        else:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    return {
+        "artifact_version": str(artifacts.manifest.get("artifact_version", "unknown")),
+        "method_used": method_used,
+        "segments": recommendation["segments"],
+        "dose_response": recommendation["dose_response"],
+        "baseline": recommendation["baseline"],
+        "warnings": warnings,
+    }
+
+
+def _compute_entry(
+    artifacts: Any,
+    objective: str,
+    max_policy_level: int,
+    segment_by: str,
+    requested_method: str,
+) -> Dict[str, Any]:
+    """The cacheable form of one answer: its serialized body, encoded variants and warnings.
+
+    The structured fields are dropped once serialized, so a cached entry holds only what
+    `ResponseCache` counts against `max_bytes`; the rare path that needs them rebuilds them.
+    """
+
+    recommendation = _compute_recommendation(artifacts, objective, max_policy_level, segment_by, requested_method)
+    body_prefix = _serialize_prefix(recommendation)
+    return {
+        "body_prefix": body_prefix,
+        "warnings": recommendation["warnings"],
+        "encoded_prefixes": encode_prefix(body_prefix),
+    }
+
+
+def _serialize_prefix(entry: Dict[str, Any]) -> bytes:
+    """Validate once and serialize everything except `request_id`, the last response field.
+
+    The returned bytes end with `"request_id":`; `_render_body` appends the value and the
+    closing brace, so cache hits skip Pydantic validation and re-serialization entirely.
+    """
+
+    validated = RecommendResponse(**{field: entry[field] for field in RESPONSE_FIELDS})
+    body = dumps_bytes(validated.model_dump(mode="json", exclude={"request_id"}))
+    return body[:-1] + b',"request_id":'
+
+
+def _render_body(body_prefix: BodyPrefix, request_id: Optional[str]) -> bytes:
+    return b"".join((body_prefix, dumps_bytes(request_id), b"}"))
+
+
+def _recommend_response(
+    request: Request,
+    body_prefix: BodyPrefix,
+    encoded_prefixes: Dict[str, EncodedPrefix],
+    request_id: Optional[str],
+) -> Response:
+    """Serve the precompressed variant the client accepts, else the raw body."""
+
+    tail = dumps_bytes(request_id) + b"}"
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), encoded_prefixes)
+    if encoding != "identity":
+        body = encoded_prefixes[encoding].render(tail)
+        if body is not None:
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+    return Response(content=b"".join((body_prefix, tail)), media_type="application/json")
+
+
+def _warm_entries(artifacts: Any, skip: Callable[[RecommendKey], bool]) -> Iterator[Tuple[RecommendKey, Dict[str, Any]]]:
+    """Yield `(key, entry)` for every objective x level x segmentation x method answer."""
+
+    settings = get_settings()
+    for objective in settings.objectives:
+        for max_policy_level in settings.treatment_levels:
+            for segment_by in settings.segmentations:
+                for method in settings.methods:
+                    cache_key = recommend_key(objective, max_policy_level, segment_by, method)
+                    if skip(cache_key):
+                        continue
+                    try:
+                        entry = _compute_entry(artifacts, objective, max_policy_level, segment_by, method)
+                    except HTTPException:
+                        continue
+                    yield cache_key, entry
+
+
+def warm_response_cache(artifacts: Any) -> int:
+    """Materialize every objective x level x segmentation x method answer for `artifacts`.
+
+    Registered as an `ArtifactCache` load hook, so a bundle is never served before its
+    responses are cached. With a shared response store configured, the answers go to (or are
+    attached from) the cross-process store instead of this process's `ResponseCache`.
+    Combinations that fail are left to the request path to report.
+    """
+
+    scope = _artifact_hash(artifacts)
+    if response_store.enabled:
+        warmed = response_store.attach(
+            _store_scope(artifacts), lambda: _warm_entries(artifacts, skip=lambda key: False)
+        )
+    else:
+        warmed = 0
+        for cache_key, entry in _warm_entries(artifacts, skip=lambda key: response_cache.contains(key, scope=scope)):
+            response_cache.set(cache_key, entry, scope=scope)
+            warmed += 1
+
+    # Keep the hash still being served so /readyz stays ready while a reload warms up.
+    serving = artifact_cache.current()
+    _warmed_hashes.intersection_update({_artifact_hash(serving)} if serving is not None else set())
+    _warmed_hashes.add(scope)
+    return warmed
+
+
+def warm_up() -> bool:
+    """Load artifacts (running the warm-up hook) ahead of traffic; False if unavailable."""
+
+    try:
+        _get_artifacts()
+    except HTTPException:
+        return False
+    return True
+
+
+@router.get("/readyz")
+def readyz() -> JSONResponse:
+    artifacts = artifact_cache.current()
+    if artifacts is None:
+        return JSONResponse(status_code=503, content={"status": "unavailable"})
+    if _artifact_hash(artifacts) not in _warmed_hashes:
+        return JSONResponse(status_code=503, content={"status": "warming"})
+    return JSONResponse(status_code=200, content={"status": "ready"})
+
+
+async def _resolve_body_prefix(
+    request: Request, artifacts: Any, payload: RecommendRequest
+) -> Tuple[BodyPrefix, Dict[str, EncodedPrefix]]:
+    """Serialized response (minus `request_id`) for `payload` and its precompressed variants.
+
+    Keyed on the requested method, so a DR request answered with the naive fallback has its
+    own cached body, warning included. Computed on a cache miss.
+    """
+
+    cache_key = payload.cache_key()
+
+    scope = _artifact_hash(artifacts)
+    cached = response_store.get(cache_key, scope=_store_scope(artifacts))
+    if cached is None:
+        cached = response_cache.get(cache_key, scope=scope)
+    if cached is None:
+        cached = await _run_cold(
+            request,
+            _compute_entry,
+            artifacts,
+            payload.objective,
+            payload.max_policy_level,
+            payload.segment_by,
+            payload.method,
+        )
+        response_cache.set(cache_key, cached, scope=scope)
+    return cached["body_prefix"], cached.get("encoded_prefixes", {})
+
+
+@router.post("/api/v1/recommend", response_model=RecommendResponse)
+async def recommend(payload: RecommendRequest, request: Request) -> Response:
+    """Cache hits are served on the event loop; only misses reach the cold-compute executor.
+
+    gzip/brotli bodies are spliced from variants compressed once per cached entry.
+    """
+
+    artifacts = await _get_artifacts_async(request)
+    body_prefix, encoded_prefixes = await _resolve_body_prefix(request, artifacts, payload)
+    return _recommend_response(request, body_prefix, encoded_prefixes, getattr(request.state, "request_id", None))
+
+
+@router.post("/api/v1/recommend:batch", response_model=RecommendBatchResponse)
+async def recommend_batch(payload: RecommendBatchRequest, request: Request) -> Response:
+    """Answer many recommend requests in one round-trip, in request order.
+
+    Identical sub-requests are resolved once and share their serialized body; every item
+    carries the batch's `request_id`.
+    """
+
+    artifacts = await _get_artifacts_async(request)
+    prefixes: Dict[RecommendKey, BodyPrefix] = {}
+    for item in payload.requests:
+        key = item.cache_key()
+        if key not in prefixes:
+            prefixes[key], _ = await _resolve_body_prefix(request, artifacts, item)
+
+    request_id = getattr(request.state, "request_id", None)
+    bodies = b",".join(_render_body(prefixes[item.cache_key()], request_id) for item in payload.requests)
+    return Response(
+        content=b'{"responses":[' + bodies + b'],"request_id":' + dumps_bytes(request_id) + b"}",
+        media_type="application/json",
+    )
+
+
+def _grid_variants(artifacts: Any) -> Dict[str, bytes]:
+    """The full recommendation grid for `artifacts`, serialized and precompressed once."""
+
+    global _grid_state
+    scope = _artifact_hash(artifacts)
+    state = _grid_state
+    if state is not None and state[0] == scope:
+        return state[1]
+
+    bundle = build_recommendation_bundle(
+        str(artifacts.manifest.get("artifact_version", "unknown")),
+        get_settings().treatment_levels,
+        lambda objective, max_policy_level, segment_by, method: _compute_recommendation(
+            artifacts, objective, max_policy_level, segment_by, method
+        ),
+    )
+    variants = compress_variants(dumps_bytes(bundle))
+    _grid_state = (scope, variants)
+    return variants
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return etag in (candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates)
+
+
+@router.get("/api/v1/recommendations/grid")
+async def recommendation_grid(request: Request) -> Response:
+    """Every recommendation for the current artifact, keyed like the static frontend bundle.
+
+    The strong `ETag` is the artifact hash, so clients can cache the whole decision surface
+    and revalidate with `If-None-Match`; a match answers 304 without touching the grid.
+    """
+
+    artifacts = await _get_artifacts_async(request)
+    etag = f'"{_artifact_hash(artifacts)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    state = _grid_state
+    if state is not None and state[0] == _artifact_hash(artifacts):
+        variants = state[1]
+    else:
+        variants = await _run_cold(request, _grid_variants, artifacts)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), variants)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=variants[encoding], media_type="application/json", headers=headers)
+
+
+def _runtime_metrics(request: Request) -> str:
+    """Scrape-time families for state other components already track."""
+
+    stats = response_cache.stats()
+    families = [
+        render_family(
+            f"edgealign_response_cache_{event}_total",
+            "counter",
+            f"ResponseCache {event}.",
+            [({}, stats[event])],
+        )
+        for event in ("hits", "misses", "evictions", "expirations", "invalidations")
+    ]
+    families.append(
+        render_family("edgealign_response_cache_entries", "gauge", "Entries in the ResponseCache.", [({}, stats["entries"])])
+    )
+    families.append(
+        render_family("edgealign_response_cache_bytes", "gauge", "Bytes held by the ResponseCache.", [({}, stats["bytes"])])
+    )
+
+    artifacts = artifact_cache.current()
+    if artifacts is not None:
+        families.append(
+            render_family(
+                "edgealign_artifact_info",
+                "gauge",
+                "The artifact currently being served.",
+                [
+                    (
+                        {
+                            "artifact_version": str(artifacts.manifest.get("artifact_version", "unknown")),
+                            "artifact_hash": _artifact_hash(artifacts),
+                        },
+                        1,
+                    )
+                ],
+            )
+        )
+        families.append(
+            render_family(
+                "edgealign_artifact_load_duration_seconds",
+                "gauge",
+                "Time each stage took when the served artifact was loaded.",
+                [({"stage": stage}, ms / 1000) for stage, ms in sorted(dict(artifacts.load_timings_ms).items())],
+            )
+        )
+
+    families.append(
+        render_family(
+            "edgealign_cold_compute_pending",
+            "gauge",
+            "Cold computations queued or running in the bounded executor.",
+            [({}, request.app.state.cold_executor.pending)],
+        )
+    )
+    limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+    families.append(
+        render_family(
+            "edgealign_threadpool_tasks_waiting",
+            "gauge",
+            "Sync route calls waiting for a Starlette threadpool slot.",
+            [({}, limiter.tasks_waiting)],
+        )
+    )
+    families.append(
+        render_family(
+            "edgealign_threadpool_busy_threads",
+            "gauge",
+            "Starlette threadpool slots in use.",
+            [({}, limiter.borrowed_tokens)],
+        )
+    )
+    return "".join(families)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request) -> Response:
+    return Response(
+        content=metrics.render() + _runtime_metrics(request),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
     )
+
+
+def _artifact_status(artifacts: Any) -> Dict[str, Any]:
+    return {
+        "artifact_version": str(artifacts.manifest.get("artifact_version", "unknown")),
+        "artifact_hash": _artifact_hash(artifacts),
+        "load_timings_ms": dict(artifacts.load_timings_ms),
+    }
+
+
+def _require_admin(admin_token: Optional[str]) -> None:
+    settings = get_settings()
+    if settings.admin_token is None:
+        if settings.app_env != "dev":
+            raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+        return
+    if admin_token is None or not hmac.compare_digest(admin_token, settings.admin_token):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.post("/api/v1/admin/reload")
+def admin_reload(request: Request, x_admin_token: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+    _require_admin(x_admin_token)
+    try:
+        artifacts = request.app.state.artifact_reloader.reload()
+    except (FileNotFoundError, ValueError) as exc:
+        raise HTTPException(status_code=503, detail=f"Reload failed; still serving previous artifacts: {exc}") from exc
+
+    return {"status": "reloaded", **_artifact_status(artifacts)}
+
+
+@router.get("/api/v1/admin/artifacts")
+def admin_artifacts(x_admin_token: Optional[str] = Header(default=None)) -> Dict[str, Any]:
+    _require_admin(x_admin_token)
+    return _artifact_status(_get_artifacts())
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Tuple
 
 from pydantic import BaseModel, Field, field_validator
 
 ALLOWED_POLICY_LEVELS = (0, 1, 2, 3, 4)
+MAX_BATCH_REQUESTS = 100
+
+# (objective, max_policy_level, segment_by, method); the artifact hash is the cache scope.
+RecommendKey = Tuple[str, int, str, str]
+
+
+def recommend_key(objective: str, max_policy_level: int, segment_by: str, method: str) -> RecommendKey:
+    return (objective, max_policy_level, segment_by, method)
 
 
 class RecommendRequest(BaseModel):
@@ -23,6 +31,15 @@ class RecommendRequest(BaseModel):
             )
         return value
 
+    def cache_key(self, method: Optional[str] = None) -> RecommendKey:
+        """Hashable key for this request, optionally with the method actually served."""
+
+        return (self.objective, self.max_policy_level, self.segment_by, method or self.method)
+
+
+class RecommendBatchRequest(BaseModel):
+    requests: List[RecommendRequest] = Field(..., min_length=1, max_length=MAX_BATCH_REQUESTS)
+
 
 class DeltaVsBaseline(BaseModel):
     successes_per_10k: float
@@ -72,6 +89,11 @@ class RecommendResponse(BaseModel):
     request_id: Optional[str] = None
 
 
+class RecommendBatchResponse(BaseModel):
+    responses: List[RecommendResponse]
+    request_id: Optional[str] = None
+
+
 class MetadataResponse(BaseModel):
     artifact_version: str
     objectives: List[str]
@@ -1,82 +1,246 @@
 from __future__ import annotations
 
-import json
 import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple
 
+from app.core.compression import EncodedPrefix
+from app.core.loader import ArtifactBundle, load_artifact_bundle
 
-@dataclass(frozen=True)
-class ArtifactBundle:
-    manifest: Dict[str, Any]
-    dose_response: Dict[str, Any]
-    baselines: Dict[str, Any]
-    has_dr: bool
+LoadHook = Callable[[ArtifactBundle], None]
 
 
 class ArtifactCache:
+    """Holds the loaded artifact bundle for one artifact directory.
+
+    Reads are lock-free: the loaded directory and bundle live in a single immutable tuple that
+    is replaced wholesale, so a reader sees either the old pair or the new one. The lock is
+    only taken to load or reload, and a second check under it keeps concurrent first requests
+    from loading twice.
+    """
+
     def __init__(self) -> None:
-        self._bundle: Optional[ArtifactBundle] = None
-        self._artifact_dir: Optional[Path] = None
+        self._state: Optional[Tuple[Path, ArtifactBundle]] = None
         self._lock = threading.Lock()
+        self._load_hooks: List[LoadHook] = []
+        self._publish_hooks: List[LoadHook] = []
+
+    def add_load_hook(self, hook: LoadHook) -> None:
+        """Run `hook(bundle)` after each load, before the bundle is served to any caller."""
+
+        with self._lock:
+            if hook not in self._load_hooks:
+                self._load_hooks.append(hook)
+
+    def add_publish_hook(self, hook: LoadHook) -> None:
+        """Run `hook(bundle)` right after `bundle` replaces the served one, never on failure."""
+
+        with self._lock:
+            if hook not in self._publish_hooks:
+                self._publish_hooks.append(hook)
+
+    def current(self) -> Optional[ArtifactBundle]:
+        """The loaded bundle, if any, without triggering a load."""
+
+        state = self._state
+        return state[1] if state is not None else None
+
+    def peek(self, artifact_dir: Path) -> Optional[ArtifactBundle]:
+        """The bundle for `artifact_dir` if it is already loaded; never loads or blocks."""
+
+        state = self._state
+        if state is not None and state[0] == artifact_dir:
+            return state[1]
+        return None
 
     def get(self, artifact_dir: Path) -> ArtifactBundle:
+        state = self._state
+        if state is not None and state[0] == artifact_dir:
+            return state[1]
+
+        with self._lock:
+            state = self._state
+            if state is not None and state[0] == artifact_dir:
+                return state[1]
+            return self._publish(artifact_dir)
+
+    def reload(self, artifact_dir: Path) -> ArtifactBundle:
+        """Load `artifact_dir` afresh and swap it in.
+
+        The current bundle keeps serving until the new one is loaded, validated and warmed by
+        the load hooks; if any of that raises, it stays in place.
+        """
+
         with self._lock:
-            if self._bundle is not None and self._artifact_dir == artifact_dir:
-                return self._bundle
-
-            manifest_path = artifact_dir / "manifest.json"
-            dose_response_path = artifact_dir / "dose_response.json"
-            baseline_path = artifact_dir / "policy_baselines.json"
-
-            if not manifest_path.exists() or not dose_response_path.exists():
-                raise FileNotFoundError(
-                    "Missing artifacts. Run `python -m app.ml.train` to generate artifacts."
-                )
-
-            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
-            dose_response = json.loads(dose_response_path.read_text(encoding="utf-8"))
-            baselines = (
-                json.loads(baseline_path.read_text(encoding="utf-8"))
-                if baseline_path.exists()
-                else {"name": "current_policy", "policy_level": 2}
-            )
-
-            has_dr = bool(manifest.get("has_dr", True))
-            bundle = ArtifactBundle(
-                manifest=manifest,
-                dose_response=dose_response,
-                baselines=baselines,
-                has_dr=has_dr,
-            )
-            self._bundle = bundle
-            self._artifact_dir = artifact_dir
-            return bundle
+            return self._publish(artifact_dir)
+
+    def _publish(self, artifact_dir: Path) -> ArtifactBundle:
+        bundle = load_artifact_bundle(artifact_dir)
+        for hook in self._load_hooks:
+            hook(bundle)
+        self._state = (artifact_dir, bundle)
+        for hook in self._publish_hooks:
+            hook(bundle)
+        return bundle
 
     def clear(self) -> None:
         with self._lock:
-            self._bundle = None
-            self._artifact_dir = None
+            self._state = None
+
+
+def _entry_size(value: Dict[str, Any]) -> int:
+    """Bytes held by a cache entry: the serialized payloads it carries, encoded variants included."""
+
+    size = 0
+    for item in value.values():
+        if isinstance(item, (bytes, bytearray, EncodedPrefix)):
+            size += len(item)
+        elif isinstance(item, dict):
+            size += _entry_size(item)
+    return size
+
+
+@dataclass
+class _CacheEntry:
+    value: Dict[str, Any]
+    size: int
+    scope: Optional[str]
+    expires_at: Optional[float]
 
 
 class ResponseCache:
-    def __init__(self) -> None:
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    """Bounded LRU cache of rendered responses, scoped to the active artifact hash.
+
+    Entries are evicted least-recently-used first once `max_entries` or `max_bytes` is
+    exceeded, and expire after `ttl_seconds` when set. `add_scope` admits writes for an
+    artifact that is still warming while the served one keeps its entries; `activate_scope`
+    then drops every entry from other scopes. Writes for an inactive scope (e.g. in-flight
+    requests on a superseded artifact) are ignored, and reads for one miss.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        # Keyed by (scope, key), so a warming artifact's entries sit next to the served one's.
+        self._cache: "OrderedDict[Tuple[Optional[str], Hashable], _CacheEntry]" = OrderedDict()
         self._lock = threading.Lock()
+        self._clock = clock
+        # None until a scope is first added: every write is accepted.
+        self._scopes: Optional[FrozenSet[str]] = None
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+        self.configure(max_entries=max_entries, max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+    def configure(self, max_entries: int, max_bytes: int, ttl_seconds: Optional[float] = None) -> None:
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("ResponseCache limits must be positive")
+        with self._lock:
+            self._max_entries = max_entries
+            self._max_bytes = max_bytes
+            self._ttl_seconds = ttl_seconds if ttl_seconds else None
+            self._evict_over_limit()
+
+    def add_scope(self, scope: str) -> None:
+        """Accept writes for `scope` too, keeping entries of the scopes already active."""
 
-    def get(self, key: str) -> Optional[Dict[str, Any]]:
         with self._lock:
-            return self._cache.get(key)
+            self._scopes = frozenset({scope}) if self._scopes is None else self._scopes | {scope}
+
+    def activate_scope(self, scope: str) -> None:
+        """Make `scope` the only active one and drop entries from every other scope."""
+
+        with self._lock:
+            if self._scopes == {scope}:
+                return
+            stale = [slot for slot, entry in self._cache.items() if entry.scope != scope]
+            for slot in stale:
+                self._remove(slot)
+            self._counters["invalidations"] += len(stale)
+            self._scopes = frozenset({scope})
+
+    def contains(self, key: Hashable, scope: Optional[str] = None) -> bool:
+        """Membership check that leaves LRU order and hit/miss counters untouched."""
 
-    def set(self, key: str, value: Dict[str, Any]) -> None:
         with self._lock:
-            self._cache[key] = value
+            return (scope, key) in self._cache
+
+    def get(self, key: Hashable, scope: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            slot = (scope, key)
+            entry = self._cache.get(slot)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            if entry.expires_at is not None and entry.expires_at <= self._clock():
+                self._remove(slot)
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._cache.move_to_end(slot)
+            self._counters["hits"] += 1
+            return entry.value
+
+    def set(self, key: Hashable, value: Dict[str, Any], scope: Optional[str] = None) -> None:
+        size = _entry_size(value)
+        with self._lock:
+            if self._scopes is not None and scope not in self._scopes:
+                return
+            if size > self._max_bytes:
+                self._counters["evictions"] += 1
+                return
+            slot = (scope, key)
+            if slot in self._cache:
+                self._remove(slot)
+            expires_at = self._clock() + self._ttl_seconds if self._ttl_seconds else None
+            self._cache[slot] = _CacheEntry(value=value, size=size, scope=scope, expires_at=expires_at)
+            self._bytes += size
+            self._evict_over_limit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._cache),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
 
     def clear(self) -> None:
         with self._lock:
             self._cache.clear()
+            self._bytes = 0
+            self._scopes = None
+
+    def _remove(self, slot: Tuple[Optional[str], Hashable]) -> None:
+        entry = self._cache.pop(slot)
+        self._bytes -= entry.size
+
+    def _evict_over_limit(self) -> None:
+        while self._cache and (len(self._cache) > self._max_entries or self._bytes > self._max_bytes):
+            _, entry = self._cache.popitem(last=False)
+            self._bytes -= entry.size
+            self._counters["evictions"] += 1
+
+
+def _scope_of(bundle: ArtifactBundle) -> str:
+    return str(bundle.manifest.get("artifact_hash", "unknown"))
 
 
 artifact_cache = ArtifactCache()
 response_cache = ResponseCache()
+# Warm the incoming artifact's scope next to the served one; retire the old scope only once
+# the new bundle is actually being served.
+artifact_cache.add_load_hook(lambda bundle: response_cache.add_scope(_scope_of(bundle)))
+artifact_cache.add_publish_hook(lambda bundle: response_cache.activate_scope(_scope_of(bundle)))
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import gzip
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Optional, Union
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:  # optional: pip install "edgealign-dr-backend[speedups]"
+    import brotli
+except ImportError:  # pragma: no cover - exercised only without brotli installed
+    brotli = None
+
+# Most preferred first when the client weighs encodings equally.
+ENCODING_PREFERENCE = ("br", "gzip", "identity")
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+_DYNAMIC_ENCODINGS = ENCODING_PREFERENCE if brotli is not None else ("gzip", "identity")
+
+# gzip header with no name, mtime 0 and an unknown OS, so output is byte-for-byte stable.
+_GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+# A stored block or uncompressed meta-block carries at most this many bytes.
+_MAX_TAIL = 65535
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """`body` under every encoding we can produce, keyed by `Content-Encoding` token.
+
+    Meant for payloads compressed once and served many times, so both codecs run at their
+    highest level. gzip output is deterministic (`mtime=0`); brotli is skipped when the
+    package is not installed.
+    """
+
+    variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    return variants
+
+
+@dataclass(frozen=True)
+class EncodedPrefix:
+    """A response prefix compressed once, to which a short uncompressed tail is spliced.
+
+    `data` ends on a byte-aligned flush point, so `render` only appends the tail as a
+    stored block (gzip) or uncompressed meta-block (brotli) and closes the stream; the
+    prefix is never compressed again. `crc32` and `size` cover the prefix, for the gzip
+    trailer.
+    """
+
+    encoding: str
+    # bytes, or a memoryview into the shared response store
+    data: Union[bytes, memoryview]
+    crc32: int
+    size: int
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def render(self, tail: bytes) -> Optional[bytes]:
+        """The full encoded body for prefix + `tail`; None if `tail` is too long to splice."""
+
+        if not tail or len(tail) > _MAX_TAIL:
+            return None
+        if self.encoding == "gzip":
+            length = len(tail)
+            return b"".join(
+                (
+                    self.data,
+                    b"\x01" + struct.pack("<HH", length, length ^ 0xFFFF),
+                    tail,
+                    struct.pack("<II", zlib.crc32(tail, self.crc32), (self.size + length) & 0xFFFFFFFF),
+                )
+            )
+        # ISLAST=0, MNIBBLES=4, MLEN-1, ISUNCOMPRESSED=1, zero-padded to a byte; then the
+        # bytes themselves and an empty last meta-block (ISLAST=1, ISLASTEMPTY=1).
+        header = (((len(tail) - 1) << 3) | (1 << 19)).to_bytes(3, "little")
+        return b"".join((self.data, header, tail, b"\x03"))
+
+
+def encode_prefix(prefix: bytes, brotli_quality: int = 5) -> Dict[str, EncodedPrefix]:
+    """Compress `prefix` once per available encoding, leaving each stream open for a tail.
+
+    Every cached response is encoded during warm-up, so brotli defaults to quality 5:
+    within a few percent of quality 9 on these bodies at a fraction of the cost.
+    """
+
+    crc32 = zlib.crc32(prefix)
+    deflate = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    gzip_data = _GZIP_HEADER + deflate.compress(prefix) + deflate.flush(zlib.Z_SYNC_FLUSH)
+    variants = {"gzip": EncodedPrefix("gzip", gzip_data, crc32, len(prefix))}
+    if brotli is not None:
+        compressor = brotli.Compressor(quality=brotli_quality)
+        variants["br"] = EncodedPrefix("br", compressor.process(prefix) + compressor.flush(), crc32, len(prefix))
+    return variants
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for item in header.split(","):
+        token, _, params = item.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[token] = quality
+    return weights
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Collection[str]) -> str:
+    """Pick the `Content-Encoding` to send from `available`, honouring `q` weights.
+
+    Falls back to `identity`, which is always acceptable unless explicitly refused; the
+    caller is expected to always offer it.
+    """
+
+    if not accept_encoding:
+        return "identity"
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*")
+    best, best_quality = "identity", 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in available:
+            continue
+        quality = weights.get(encoding, wildcard if wildcard is not None else (1.0 if encoding == "identity" else 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _is_compressible(content_type: Optional[str]) -> bool:
+    return content_type is not None and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """Negotiate gzip/brotli for responses that are not already encoded.
+
+    Routes that keep precompressed bodies (recommendations, the grid) set
+    `Content-Encoding` themselves and pass through untouched; everything else that is
+    compressible and at least `minimum_size` bytes is compressed here, per response, at
+    cheap levels. Bodies sent in several chunks are buffered only when `Content-Length`
+    says they fit in `max_buffer_size`; other streaming responses pass through as-is.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        max_buffer_size: int = 4 * 1024 * 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_buffer_size = max_buffer_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        accept_encoding = Headers(scope=scope).get("accept-encoding") if scope["type"] == "http" else None
+        encoding = negotiate_encoding(accept_encoding, _DYNAMIC_ENCODINGS)
+        if encoding == "identity":
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                headers = MutableHeaders(raw=start.setdefault("headers", []))
+                content_length = headers.get("content-length")
+                if (
+                    "content-encoding" in headers
+                    or not _is_compressible(headers.get("content-type"))
+                    or (content_length is not None and int(content_length) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    return
+                _add_vary(headers)
+                if content_length is None or int(content_length) > self.max_buffer_size:
+                    passthrough = True
+                    await send(start)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start["headers"])
+            if len(body) >= self.minimum_size:
+                if encoding == "br":
+                    body = brotli.compress(body, quality=self.brotli_quality)
+                else:
+                    body = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
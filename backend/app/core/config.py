@@ -4,7 +4,7 @@ import os
 from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
-from typing import Tuple
+from typing import Optional, Tuple
 
 
 @dataclass(frozen=True)
@@ -14,6 +14,17 @@ class Settings:
     treatment_levels: Tuple[int, ...]
     objectives: Tuple[str, ...]
     segmentations: Tuple[str, ...]
+    methods: Tuple[str, ...]
+    response_cache_max_entries: int
+    response_cache_max_bytes: int
+    response_cache_ttl_seconds: Optional[float]
+    artifact_reload_interval_seconds: float
+    admin_token: Optional[str]
+    response_store_dir: Optional[Path]
+    cold_compute_workers: int
+    cold_compute_max_pending: int
+    compression_minimum_size: int
+    access_log_sample_rate: float
 
 
 @lru_cache(maxsize=1)
@@ -27,4 +38,17 @@ def get_settings() -> Settings:
         treatment_levels=(0, 1, 2, 3, 4),
         objectives=("task_success", "safe_value"),
         segmentations=("none", "device_tier", "prompt_risk", "task_domain"),
+        methods=("naive", "dr"),
+        response_cache_max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")),
+        response_cache_max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+        response_cache_ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "0")) or None,
+        artifact_reload_interval_seconds=float(os.getenv("ARTIFACT_RELOAD_INTERVAL_SECONDS", "10")),
+        admin_token=os.getenv("ADMIN_TOKEN") or None,
+        response_store_dir=Path(os.environ["RESPONSE_STORE_DIR"]).expanduser().resolve()
+        if os.getenv("RESPONSE_STORE_DIR")
+        else None,
+        cold_compute_workers=int(os.getenv("COLD_COMPUTE_WORKERS", "4")),
+        cold_compute_max_pending=int(os.getenv("COLD_COMPUTE_MAX_PENDING", "64")),
+        compression_minimum_size=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
+        access_log_sample_rate=float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0")),
     )
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.core.metrics import cold_compute_duration_seconds
+
+T = TypeVar("T")
+
+
+def _timed(func: Callable[..., T], *args: Any) -> T:
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        cold_compute_duration_seconds.observe(time.perf_counter() - started, func.__name__.lstrip("_"))
+
+
+class ExecutorSaturated(RuntimeError):
+    """More cold computations are pending than the executor accepts."""
+
+
+class ColdComputeExecutor:
+    """Bounded thread pool for work that must stay off the event loop.
+
+    Async routes serve cached answers inline and only send cache misses and artifact loads
+    here. At most `max_pending` calls may be queued or running; beyond that `run` raises
+    `ExecutorSaturated` instead of letting the backlog grow without bound. `pending` is only
+    touched from the event loop thread, so it needs no lock.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64) -> None:
+        if max_workers < 1 or max_pending < 1:
+            raise ValueError("ColdComputeExecutor limits must be positive")
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self._max_pending:
+            raise ExecutorSaturated(f"{self.pending} cold computations already pending")
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="cold-compute")
+        self.pending += 1
+        try:
+            return await asyncio.wrap_future(self._executor.submit(_timed, func, *args))
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from app.ml.policy import (
+    POLICY_TABLE_ARRAYS,
+    POLICY_TABLE_INDEX,
+    PolicyTable,
+    compile_policy_table,
+    load_policy_table,
+)
+
+HASH_CHUNK_BYTES = 1024 * 1024
+DEFAULT_BASELINES = {"name": "current_policy", "policy_level": 2}
+
+
+class ArtifactIntegrityError(ValueError):
+    """An artifact file does not match the SHA-256 recorded in the manifest."""
+
+
+def sha256_file(path: Path, chunk_bytes: int = HASH_CHUNK_BYTES) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_bytes), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _check_digest(name: str, actual: str, file_hashes: Mapping[str, str]) -> None:
+    expected = file_hashes.get(name)
+    if expected is not None and actual != expected:
+        raise ArtifactIntegrityError(
+            f"Artifact file '{name}' does not match manifest file_hashes (expected {expected[:12]}, got {actual[:12]})"
+        )
+
+
+def _read_verified(artifact_dir: Path, name: str, file_hashes: Mapping[str, str]) -> bytes:
+    """Read a small artifact file once, checking its hash against the manifest."""
+
+    blob = (artifact_dir / name).read_bytes()
+    _check_digest(name, hashlib.sha256(blob).hexdigest(), file_hashes)
+    return blob
+
+
+def _verify_file(artifact_dir: Path, name: str, file_hashes: Mapping[str, str]) -> Path:
+    """Stream a large artifact file through SHA-256 before it is loaded."""
+
+    path = artifact_dir / name
+    if not path.exists():
+        raise FileNotFoundError(f"Missing artifact file '{name}' in {artifact_dir}")
+    if name in file_hashes:
+        _check_digest(name, sha256_file(path), file_hashes)
+    return path
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class LazyArtifacts:
+    """Heavy artifact components, verified and loaded on first use, then memoized.
+
+    Serving recommendations needs none of these, so they stay on disk unless an endpoint or
+    tool asks for them. Each load is timed into the bundle's `load_timings_ms`.
+    """
+
+    def __init__(self, artifact_dir: Path, file_hashes: Mapping[str, str], load_timings_ms: Dict[str, float]) -> None:
+        self._artifact_dir = artifact_dir
+        self._file_hashes = dict(file_hashes)
+        self._load_timings_ms = load_timings_ms
+        self._loaded: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def dose_response(self) -> Dict[str, Any]:
+        """The full `dose_response.json` payload, which binary-table bundles never parse at load."""
+
+        return self._get("dose_response_json", ["dose_response.json"], self._load_json)
+
+    def propensity_model(self) -> Any:
+        return self._get("propensity_model", ["propensity_model.joblib"], self._load_joblib)
+
+    def outcome_models(self) -> Dict[str, Any]:
+        return self._get("outcome_models", ["outcome_model.joblib"], self._load_joblib)
+
+    def dataset(self) -> Any:
+        """The training dataset, from `demo.parquet` or the partitioned `demo/` parts."""
+
+        names = sorted(name for name in self._file_hashes if name.startswith("demo/"))
+        if not names:
+            names = ["demo.parquet"]
+        return self._get("dataset", names, self._load_parquet)
+
+    def _get(self, component: str, names: List[str], load: Callable[[List[Path]], Any]) -> Any:
+        if component in self._loaded:
+            return self._loaded[component]
+        with self._lock:
+            if component not in self._loaded:
+                started = time.perf_counter()
+                paths = [_verify_file(self._artifact_dir, name, self._file_hashes) for name in names]
+                self._loaded[component] = load(paths)
+                self._load_timings_ms[component] = _elapsed_ms(started)
+            return self._loaded[component]
+
+    @staticmethod
+    def _load_json(paths: List[Path]) -> Any:
+        return json.loads(paths[0].read_bytes())
+
+    @staticmethod
+    def _load_joblib(paths: List[Path]) -> Any:
+        import joblib
+
+        return joblib.load(paths[0])
+
+    @staticmethod
+    def _load_parquet(paths: List[Path]) -> Any:
+        import pandas as pd
+
+        return pd.concat([pd.read_parquet(path) for path in paths], ignore_index=True)
+
+
+@dataclass(frozen=True)
+class ArtifactBundle:
+    manifest: Dict[str, Any]
+    # None when the policy table came from the binary artifact; see `components.dose_response()`.
+    dose_response: Optional[Dict[str, Any]]
+    baselines: Dict[str, Any]
+    has_dr: bool
+    policy_table: PolicyTable
+    components: Optional[LazyArtifacts] = None
+    load_timings_ms: Dict[str, float] = field(default_factory=dict)
+
+
+def _load_binary_policy_table(artifact_dir: Path, file_hashes: Mapping[str, str]) -> PolicyTable:
+    index = json.loads(_read_verified(artifact_dir, POLICY_TABLE_INDEX, file_hashes))
+    arrays_path = _verify_file(artifact_dir, POLICY_TABLE_ARRAYS, file_hashes)
+    return load_policy_table(index, arrays_path, mmap=True)
+
+
+def load_artifact_bundle(artifact_dir: Path) -> ArtifactBundle:
+    """Load the files needed to serve recommendations, verified against `file_hashes`.
+
+    The memory-mapped binary policy table (`policy_table.json` + `policy_table.npy`) is
+    preferred; artifacts without it fall back to parsing and compiling `dose_response.json`.
+    Raises `FileNotFoundError` for missing artifacts and `ValueError` (including
+    `ArtifactIntegrityError`) for malformed or partially written ones, e.g. mid-rsync.
+    Manifests without `file_hashes` are loaded unverified.
+    """
+
+    manifest_path = artifact_dir / "manifest.json"
+    dose_response_path = artifact_dir / "dose_response.json"
+    baseline_path = artifact_dir / "policy_baselines.json"
+    has_binary_table = (artifact_dir / POLICY_TABLE_INDEX).exists() and (artifact_dir / POLICY_TABLE_ARRAYS).exists()
+
+    if not manifest_path.exists() or not (has_binary_table or dose_response_path.exists()):
+        raise FileNotFoundError(
+            "Missing artifacts. Run `python -m app.ml.train` to generate artifacts."
+        )
+
+    load_timings_ms: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    manifest = json.loads(manifest_path.read_bytes())
+    file_hashes: Dict[str, str] = dict(manifest.get("file_hashes") or {})
+    load_timings_ms["manifest"] = _elapsed_ms(started)
+
+    started = time.perf_counter()
+    baselines = (
+        json.loads(_read_verified(artifact_dir, "policy_baselines.json", file_hashes))
+        if baseline_path.exists()
+        else dict(DEFAULT_BASELINES)
+    )
+    load_timings_ms["baselines"] = _elapsed_ms(started)
+
+    dose_response: Optional[Dict[str, Any]] = None
+    started = time.perf_counter()
+    if has_binary_table:
+        try:
+            policy_table = _load_binary_policy_table(artifact_dir, file_hashes)
+        except (KeyError, TypeError) as exc:
+            raise ValueError(f"Malformed {POLICY_TABLE_INDEX}: {exc!r}") from exc
+    else:
+        dose_response = json.loads(_read_verified(artifact_dir, "dose_response.json", file_hashes))
+        load_timings_ms["dose_response"] = _elapsed_ms(started)
+        started = time.perf_counter()
+        try:
+            policy_table = compile_policy_table(dose_response)
+        except (KeyError, TypeError, IndexError) as exc:
+            raise ValueError(f"Malformed dose_response.json: {exc!r}") from exc
+    load_timings_ms["policy_table"] = _elapsed_ms(started)
+
+    return ArtifactBundle(
+        manifest=manifest,
+        dose_response=dose_response,
+        baselines=baselines,
+        has_dr=bool(manifest.get("has_dr", True)),
+        policy_table=policy_table,
+        components=LazyArtifacts(artifact_dir, file_hashes, load_timings_ms),
+        load_timings_ms=load_timings_ms,
+    )
@@ -1,21 +1,41 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
+import os
+import queue
+import sys
 from datetime import datetime, timezone
-from typing import Any, Dict
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO, Any, Dict, Optional, Tuple
+
+_listener: Optional[QueueListener] = None
+# (app_env, stream) of the last `configure_logging`, to restart the writer after a fork.
+_configured: Optional[Tuple[str, Optional[IO[str]]]] = None
 
 
 class JsonFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         payload: Dict[str, Any] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            # `created`, not now(): records are formatted later, on the writer thread.
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
 
-        for key in ("request_id", "path", "method", "status_code", "duration_ms"):
+        for key in (
+            "request_id",
+            "path",
+            "method",
+            "status_code",
+            "duration_ms",
+            "artifact_version",
+            "artifact_hash",
+            "error",
+            "load_timings_ms",
+        ):
             value = getattr(record, key, None)
             if value is not None:
                 payload[key] = value
@@ -26,15 +46,65 @@ class JsonFormatter(logging.Formatter):
         return json.dumps(payload)
 
 
-def configure_logging(app_env: str) -> None:
-    root_logger = logging.getLogger()
-    root_logger.handlers.clear()
+class _InProcessQueueHandler(QueueHandler):
+    """Enqueue records untouched; the writer thread does all formatting, tracebacks included.
+
+    The stock `prepare` formats on the calling thread so records can be pickled, which an
+    in-process queue does not need.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
-    handler = logging.StreamHandler()
+
+def configure_logging(app_env: str, stream: Optional[IO[str]] = None) -> None:
+    """Route all logging through a queue to a background writer thread.
+
+    Callers (the event loop included) only enqueue a record; JSON formatting and the write
+    to `stream` (stderr by default) happen on the listener thread. Reconfiguring stops the
+    previous listener after it drains; a forked child gets a fresh queue and listener.
+    """
+
+    global _listener, _configured
+    shutdown_logging()
+    _configured = (app_env, stream)
+
+    handler = logging.StreamHandler(stream if stream is not None else sys.stderr)
     handler.setFormatter(JsonFormatter())
-    root_logger.addHandler(handler)
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _listener = QueueListener(records, handler)
+    _listener.start()
+
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    root_logger.addHandler(_InProcessQueueHandler(records))
 
     if app_env == "prod":
         root_logger.setLevel(logging.INFO)
     else:
         root_logger.setLevel(logging.DEBUG)
+
+
+def shutdown_logging() -> None:
+    """Write out every queued record and stop the writer thread."""
+
+    global _listener, _configured
+    listener, _listener = _listener, None
+    _configured = None
+    if listener is not None:
+        listener.stop()
+
+
+def _restart_after_fork() -> None:
+    """Give a forked child its own listener; the parent's thread does not survive the fork."""
+
+    global _listener
+    # The parent still owns its listener and whatever is left in its queue.
+    _listener = None
+    if _configured is not None:
+        configure_logging(*_configured)
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple, TypeVar, Union
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Mapping[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render_family(name: str, kind: str, help_text: str, samples: Iterable[Sample]) -> str:
+    """One metric family in the Prometheus text exposition format (version 0.0.4)."""
+
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> str:
+        with self._lock:
+            values = sorted(self._values.items())
+        return render_family(
+            self.name,
+            "counter",
+            self.help_text,
+            ((dict(zip(self.labels, label_values)), value) for label_values, value in values),
+        )
+
+
+class Histogram:
+    """Cumulative-bucket histogram; `observe` is a bisect and three adds under a lock."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts with a trailing +Inf slot, sum, count)
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+            counts, totals = series
+            counts[index] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            series = sorted((key, (list(counts), list(totals))) for key, (counts, totals) in self._series.items())
+
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, (total, count)) in series:
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(count)}")
+        return "\n".join(lines) + "\n"
+
+
+Metric = TypeVar("Metric", Counter, Histogram)
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in Prometheus text format at `/metrics`.
+
+    Request latency and cold-computation timings are recorded as they happen; gauges and
+    counters that other components already track (cache stats, artifact load timings,
+    executor depth) are read at scrape time by the endpoint instead of being mirrored here.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[Union[Counter, Histogram]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        return "".join(metric.render() for metric in metrics)
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+
+metrics = MetricsRegistry()
+
+http_requests_total = metrics.counter(
+    "edgealign_http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    labels=("method", "route", "status_code"),
+)
+http_request_duration_seconds = metrics.histogram(
+    "edgealign_http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    labels=("method", "route"),
+)
+cold_compute_duration_seconds = metrics.histogram(
+    "edgealign_cold_compute_duration_seconds",
+    "Time spent running cache-miss work (recommendation computation, artifact loads) in the cold-compute executor.",
+    labels=("operation",),
+)
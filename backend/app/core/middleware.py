@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+import random
+import time
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import http_request_duration_seconds, http_requests_total
+
+_REQUEST_ID_HEADER = b"x-request-id"
+# Per-process random prefix plus a counter: unique across workers without a uuid4 per request.
+_request_id_prefix = os.urandom(6).hex()
+_request_counter = itertools.count(1)
+
+
+def _reset_request_ids() -> None:
+    global _request_id_prefix, _request_counter
+    _request_id_prefix = os.urandom(6).hex()
+    _request_counter = itertools.count(1)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_request_ids)
+
+
+def next_request_id() -> str:
+    return f"{_request_id_prefix}-{next(_request_counter):x}"
+
+
+def _route_template(scope: Scope) -> str:
+    """The matched route's path template, so `/metrics` label cardinality stays bounded."""
+
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestContextMiddleware:
+    """Assign a request id, echo it as `X-Request-Id` and log one access line per request.
+
+    A plain ASGI middleware, so responses stream straight through instead of being copied
+    through the extra task `BaseHTTPMiddleware` adds. Successful requests are logged with
+    probability `sample_rate`; 5xx responses and unhandled errors are always logged. Every
+    request, sampled or not, is counted in the `/metrics` latency histogram.
+    """
+
+    def __init__(self, app: ASGIApp, logger: logging.Logger, sample_rate: float = 1.0) -> None:
+        self.app = app
+        self.logger = logger
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, _REQUEST_ID_HEADER) or next_request_id()
+        scope.setdefault("state", {})["request_id"] = request_id
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((_REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except Exception:
+            self._record(scope, 500, started)
+            self.logger.exception(
+                "request_failed",
+                extra={
+                    "request_id": request_id,
+                    "path": scope["path"],
+                    "method": scope["method"],
+                    "status_code": 500,
+                },
+            )
+            raise
+
+        duration_seconds = self._record(scope, status_code, started)
+        if status_code >= 500 or self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+            self.logger.info(
+                "request_completed",
+                extra={
+                    "request_id": request_id,
+                    "path": scope["path"],
+                    "method": scope["method"],
+                    "status_code": status_code,
+                    "duration_ms": round(duration_seconds * 1000, 2),
+                },
+            )
+
+    @staticmethod
+    def _record(scope: Scope, status_code: int, started: float) -> float:
+        duration_seconds = time.perf_counter() - started
+        route = _route_template(scope)
+        http_request_duration_seconds.observe(duration_seconds, scope["method"], route)
+        http_requests_total.inc(scope["method"], route, str(status_code))
+        return duration_seconds
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+from app.core.cache import ArtifactBundle, ArtifactCache
+
+reload_logger = logging.getLogger("edgealign.reload")
+
+ManifestSignature = Tuple[int, int]
+
+
+class ArtifactReloader:
+    """Swaps in new artifacts when `manifest.json` changes, without a restart.
+
+    `train` writes the manifest last, so a new manifest mtime or size means a complete
+    artifact set. A background thread polls for that every `interval_seconds`; `reload()`
+    forces a reload on demand. Loading, validation and warm-up all happen in
+    `ArtifactCache.reload`, so requests keep being served from the previous bundle until
+    the swap and a failed load leaves it in place.
+    """
+
+    def __init__(self, cache: ArtifactCache, artifact_dir: Path, interval_seconds: float = 10.0) -> None:
+        self._cache = cache
+        self._artifact_dir = artifact_dir
+        self._interval_seconds = interval_seconds
+        self._reload_lock = threading.Lock()
+        self._seen: Optional[ManifestSignature] = self._signature()
+        self._failed: Optional[ManifestSignature] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _signature(self) -> Optional[ManifestSignature]:
+        try:
+            stat = (self._artifact_dir / "manifest.json").stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def reload(self) -> ArtifactBundle:
+        """Reload unconditionally; raises if the new artifacts fail to load or validate."""
+
+        with self._reload_lock:
+            signature = self._signature()
+            started = time.perf_counter()
+            bundle = self._cache.reload(self._artifact_dir)
+            self._seen = signature
+            self._failed = None
+            reload_logger.info(
+                "artifacts_reloaded",
+                extra={
+                    "artifact_version": bundle.manifest.get("artifact_version"),
+                    "artifact_hash": bundle.manifest.get("artifact_hash"),
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "load_timings_ms": bundle.load_timings_ms,
+                },
+            )
+            return bundle
+
+    def check(self) -> bool:
+        """Reload if the manifest changed since the last successful load; True if it did.
+
+        A manifest that fails to load is retried on every check (it may still be mid-write),
+        but only logged once until it changes again.
+        """
+
+        signature = self._signature()
+        if signature is None or signature == self._seen:
+            return False
+        try:
+            self.reload()
+        except (FileNotFoundError, ValueError) as exc:
+            if signature != self._failed:
+                self._failed = signature
+                reload_logger.warning("artifact_reload_failed", extra={"error": str(exc)})
+            return False
+        return True
+
+    def start(self) -> None:
+        if self._interval_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="artifact-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval_seconds):
+            try:
+                self.check()
+            except Exception:
+                reload_logger.exception("artifact_reload_crashed")
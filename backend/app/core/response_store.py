@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.compression import EncodedPrefix
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+STORE_FORMAT_VERSION = 2
+_HEADER = struct.Struct("<Q")
+
+# key -> entry whose `body_prefix` and encoded `data` are memoryviews into the mapping.
+StoreIndex = Dict[Hashable, Dict[str, Any]]
+
+
+@contextmanager
+def _exclusive_lock(path: Path) -> Iterator[None]:
+    with path.open("a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class SharedResponseStore:
+    """Precomputed response bodies in one memory-mapped file shared by worker processes.
+
+    The first process to attach for a scope builds `responses-v<format>-<scope>.bin` under
+    an exclusive `flock`; every other process waits on that lock, then maps the finished
+    file read-only, so the bodies live once in the page cache instead of once per worker.
+    The file is written to a temp name and renamed into place, so it is never seen
+    half-written; one that still cannot be read (or has another format or scope) is rebuilt
+    under the lock. Disabled (every lookup misses) until `configure` is given a directory.
+    """
+
+    def __init__(self, directory: Optional[Path] = None) -> None:
+        self._directory = directory
+        self._state: Optional[Tuple[str, mmap.mmap, StoreIndex]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._directory is not None
+
+    def configure(self, directory: Optional[Path]) -> None:
+        with self._lock:
+            self._directory = directory
+            self._state = None
+
+    def attach(self, scope: str, build: Callable[[], Iterable[Tuple[Tuple[Any, ...], Dict[str, Any]]]]) -> int:
+        """Map the store for `scope`, building it from `build()` if no process has yet.
+
+        `build` yields `(key, entry)` pairs whose entries carry `body_prefix` and `warnings`,
+        plus optional `encoded_prefixes`, stored next to the raw bytes.
+        Returns the number of entries this call wrote (0 when it attached to an existing file).
+        """
+
+        if self._directory is None:
+            raise RuntimeError("SharedResponseStore is not configured with a directory")
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._directory / f"{self._stem(scope)}.bin"
+
+        written = 0
+        with self._lock:
+            mapping = self._try_map(path, scope)
+            if mapping is None:
+                with _exclusive_lock(self._directory / f"{self._stem(scope)}.lock"):
+                    mapping = self._try_map(path, scope)
+                    if mapping is None:
+                        written = self._write(path, scope, build())
+                        self._prune(keep=scope)
+                        mapping = self._map(path, scope)
+            self._state = (scope, *mapping)
+        return written
+
+    def get(self, key: Hashable, scope: str) -> Optional[Dict[str, Any]]:
+        """The entry for `key`, shared and read-only; its bytes are views into the mapping.
+
+        Nothing is copied per call: `body_prefix` and each encoded prefix's `data` are
+        `memoryview` slices built once at attach time, so a body leaves the page cache only
+        when it is written to the response.
+        """
+
+        state = self._state
+        if state is None or state[0] != scope:
+            return None
+        return state[2].get(key)
+
+    def __len__(self) -> int:
+        state = self._state
+        return len(state[2]) if state is not None else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._state = None
+
+    @staticmethod
+    def _write(path: Path, scope: str, entries: Iterable[Tuple[Tuple[Any, ...], Dict[str, Any]]]) -> int:
+        records: List[List[Any]] = []
+        bodies: List[bytes] = []
+        offset = 0
+        for key, entry in entries:
+            body = entry["body_prefix"]
+            record = [list(key), offset, len(body), list(entry["warnings"]), {}]
+            bodies.append(body)
+            offset += len(body)
+            for encoding, encoded in entry.get("encoded_prefixes", {}).items():
+                record[4][encoding] = [offset, len(encoded.data), encoded.crc32]
+                bodies.append(encoded.data)
+                offset += len(encoded.data)
+            records.append(record)
+
+        index = json.dumps(
+            {"format_version": STORE_FORMAT_VERSION, "scope": scope, "entries": records},
+            separators=(",", ":"),
+        ).encode("utf-8")
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with tmp_path.open("wb") as handle:
+            handle.write(_HEADER.pack(len(index)))
+            handle.write(index)
+            for body in bodies:
+                handle.write(body)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+        return len(records)
+
+    @staticmethod
+    def _stem(scope: str) -> str:
+        return f"responses-v{STORE_FORMAT_VERSION}-{scope}"
+
+    @classmethod
+    def _try_map(cls, path: Path, scope: str) -> Optional[Tuple[mmap.mmap, StoreIndex]]:
+        """`_map(path, scope)`, or None when the file is missing, unreadable or mismatched."""
+
+        if not path.exists():
+            return None
+        try:
+            return cls._map(path, scope)
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+
+    @staticmethod
+    def _map(path: Path, scope: str) -> Tuple[mmap.mmap, StoreIndex]:
+        with path.open("rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        (index_len,) = _HEADER.unpack_from(mapped, 0)
+        index = json.loads(mapped[_HEADER.size : _HEADER.size + index_len])
+        if index.get("format_version") != STORE_FORMAT_VERSION or index.get("scope") != scope:
+            raise ValueError(f"Response store {path.name} does not match scope {scope}")
+
+        view = memoryview(mapped)[_HEADER.size + index_len :]
+        entries: StoreIndex = {
+            tuple(key): {
+                "body_prefix": view[offset : offset + length],
+                "warnings": warnings,
+                "encoded_prefixes": {
+                    encoding: EncodedPrefix(encoding, view[start : start + size], crc32, length)
+                    for encoding, (start, size, crc32) in encoded.items()
+                },
+            }
+            for key, offset, length, warnings, encoded in index["entries"]
+        }
+        return mapped, entries
+
+    def _prune(self, keep: str) -> None:
+        """Remove stores for superseded artifacts; processes still mapping them keep their pages."""
+
+        stem = self._stem(keep)
+        for stale in self._directory.glob("responses-*"):
+            if stale.name not in (f"{stem}.bin", f"{stem}.lock"):
+                stale.unlink(missing_ok=True)
+
+
+response_store = SharedResponseStore()
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:  # optional speedup: pip install "edgealign-dr-backend[speedups]"
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson installed
+    orjson = None
+
+
+def dumps_bytes(payload: Any) -> bytes:
+    """Compact UTF-8 JSON, via orjson when it is installed."""
+
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
@@ -2,62 +2,77 @@ from __future__ import annotations
 
 import logging
 import time
-import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
-from app.api.routes import router
+from app.api.routes import router, warm_response_cache, warm_up
+from app.core.cache import artifact_cache, response_cache
+from app.core.compression import CompressionMiddleware
 from app.core.config import get_settings
+from app.core.executor import ColdComputeExecutor
 from app.core.logging import configure_logging
+from app.core.middleware import RequestContextMiddleware
+from app.core.reload import ArtifactReloader
+from app.core.response_store import response_store
 
 request_logger = logging.getLogger("edgealign.request")
+app_logger = logging.getLogger("edgealign.app")
 
 
-def create_app() -> FastAPI:
-    settings = get_settings()
-    configure_logging(settings.app_env)
-
-    app = FastAPI(title="EdgeAlign-DR API", version="0.1.0")
-
-    @app.middleware("http")
-    async def request_context_middleware(request: Request, call_next):
-        request_id = request.headers.get("X-Request-Id", str(uuid.uuid4()))
-        request.state.request_id = request_id
-        started = time.perf_counter()
-
-        try:
-            response = await call_next(request)
-            status_code = response.status_code
-        except Exception:
-            status_code = 500
-            request_logger.exception(
-                "request_failed",
-                extra={
-                    "request_id": request_id,
-                    "path": request.url.path,
-                    "method": request.method,
-                    "status_code": status_code,
-                },
-            )
-            raise
-
-        duration_ms = round((time.perf_counter() - started) * 1000, 2)
-        response.headers["X-Request-Id"] = request_id
-        request_logger.info(
-            "request_completed",
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    started = time.perf_counter()
+    if warm_up():
+        app_logger.info(
+            "artifacts_warmed",
             extra={
-                "request_id": request_id,
-                "path": request.url.path,
-                "method": request.method,
-                "status_code": status_code,
-                "duration_ms": duration_ms,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "load_timings_ms": artifact_cache.current().load_timings_ms,
             },
         )
-        return response
+    else:
+        app_logger.warning("artifacts_unavailable_at_startup")
+    app.state.artifact_reloader.start()
+    try:
+        yield
+    finally:
+        app.state.artifact_reloader.stop()
+        app.state.cold_executor.shutdown()
+
+
+def create_app() -> FastAPI:
+    settings = get_settings()
+    configure_logging(settings.app_env)
 
+    response_cache.configure(
+        max_entries=settings.response_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        ttl_seconds=settings.response_cache_ttl_seconds,
+    )
+    response_store.configure(settings.response_store_dir)
+    artifact_cache.add_load_hook(warm_response_cache)
+    app = FastAPI(title="EdgeAlign-DR API", version="0.1.0", lifespan=lifespan)
+    app.state.cold_executor = ColdComputeExecutor(
+        max_workers=settings.cold_compute_workers,
+        max_pending=settings.cold_compute_max_pending,
+    )
+    app.state.artifact_reloader = ArtifactReloader(
+        artifact_cache,
+        settings.artifact_dir,
+        interval_seconds=settings.artifact_reload_interval_seconds,
+    )
+
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.compression_minimum_size)
+    app.add_middleware(
+        RequestContextMiddleware,
+        logger=request_logger,
+        sample_rate=settings.access_log_sample_rate,
+    )
     app.include_router(router)
 
     static_dir = Path(__file__).resolve().parent / "static"
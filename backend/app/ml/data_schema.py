@@ -28,6 +28,20 @@ NUMERIC_FEATURES: List[str] = [
 
 FEATURE_COLUMNS: List[str] = CATEGORICAL_FEATURES + NUMERIC_FEATURES
 
+# Shared category dictionary. Codes are positions in these lists, so the synthetic generator,
+# Parquet chunks and estimators all agree on the integer encoding.
+CATEGORY_LEVELS: Dict[str, List[str]] = {
+    "device_tier": ["entry", "mid", "premium"],
+    "prompt_risk": ["low", "medium", "high"],
+    "task_domain": ["assistant", "code", "support"],
+    "region": ["NA", "EU", "APAC", "LATAM"],
+    "connectivity": ["offline", "poor", "good"],
+}
+
+CATEGORY_DTYPES: Dict[str, pd.CategoricalDtype] = {
+    col: pd.CategoricalDtype(categories=levels) for col, levels in CATEGORY_LEVELS.items()
+}
+
 SEGMENT_COLUMNS: Dict[str, str] = {
     "none": "__all__",
     "device_tier": "device_tier",
@@ -53,6 +67,21 @@ REQUIRED_COLUMNS = set(
 )
 
 
+def category_code(col: str, value: str) -> int:
+    return CATEGORY_LEVELS[col].index(value)
+
+
+def encode_categoricals(df: pd.DataFrame) -> pd.DataFrame:
+    """Return `df` with every categorical feature cast to its shared `CategoricalDtype`."""
+
+    updates = {
+        col: df[col].astype(dtype)
+        for col, dtype in CATEGORY_DTYPES.items()
+        if col in df.columns and df[col].dtype != dtype
+    }
+    return df.assign(**updates) if updates else df
+
+
 def validate_dataframe(df: pd.DataFrame, schema: DataSchema) -> None:
     missing_cols = REQUIRED_COLUMNS - set(df.columns)
     if missing_cols:
@@ -71,6 +100,15 @@ def validate_dataframe(df: pd.DataFrame, schema: DataSchema) -> None:
         if df[col].isna().any():
             raise ValueError(f"Segment column '{col}' contains null values")
 
+    for col, levels in CATEGORY_LEVELS.items():
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            unknown = sorted(set(map(str, values.cat.categories)) - set(levels))
+        else:
+            unknown = sorted(set(map(str, values.dropna().unique())) - set(levels))
+        if unknown:
+            raise ValueError(f"Column '{col}' contains unknown categories: {unknown}")
+
 
 def make_segment_label(segment_by: str, segment_value: str) -> str:
     if segment_by == "none":
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
 from dataclasses import asdict, dataclass
-from typing import Dict, Iterable, Mapping
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
@@ -18,6 +19,7 @@ from app.ml.data_schema import (
     SEGMENT_COLUMNS,
     TREATMENT_COL,
 )
+from app.ml.parallel import run_parallel
 
 
 def _make_one_hot_encoder() -> OneHotEncoder:
@@ -38,16 +40,66 @@ class EstimatePoint:
         return asdict(self)
 
 
-def _summarize(values: np.ndarray) -> EstimatePoint:
-    if values.size == 0:
+def _estimate_point(mean: float, variance: float, n: int) -> EstimatePoint:
+    if n == 0:
         raise ValueError("Cannot summarize an empty vector")
-    mean = float(np.mean(values))
-    if values.size == 1:
+    mean = float(mean)
+    if n == 1:
         return EstimatePoint(mean=mean, ci_low=mean, ci_high=mean, n=1)
-    std = float(np.std(values, ddof=1))
-    se = std / np.sqrt(values.size)
+    se = float(np.sqrt(variance)) / np.sqrt(n)
     margin = 1.96 * se
-    return EstimatePoint(mean=mean, ci_low=mean - margin, ci_high=mean + margin, n=int(values.size))
+    return EstimatePoint(mean=mean, ci_low=mean - margin, ci_high=mean + margin, n=int(n))
+
+
+@dataclass(frozen=True)
+class GroupedMoments:
+    """Count, mean and sample variance (ddof=1) for every group, from one pass over the rows."""
+
+    counts: np.ndarray
+    means: np.ndarray
+    variances: np.ndarray
+
+    def point(self, group: int) -> EstimatePoint:
+        return _estimate_point(self.means[group], self.variances[group], int(self.counts[group]))
+
+
+def grouped_moments(codes: np.ndarray, n_groups: int, values: np.ndarray) -> GroupedMoments:
+    """Aggregate `values` by integer `codes` in `[0, n_groups)`; negative codes are skipped.
+
+    One stable sort puts every group's rows in a contiguous slice, in their original order,
+    and each slice is reduced with `np.mean` / `np.var`. That matches summarizing each
+    masked group on its own bit for bit, so artifact hashes stay reproducible.
+    """
+
+    return grouped_column_moments(codes, n_groups, values[:, None])[0]
+
+
+def grouped_column_moments(codes: np.ndarray, n_groups: int, columns: np.ndarray) -> List[GroupedMoments]:
+    """`grouped_moments` of every column of the 2-D `columns`, sorting `codes` once."""
+
+    keep = codes >= 0
+    if not keep.all():
+        codes = codes[keep]
+        columns = columns[keep]
+
+    order = np.argsort(codes, kind="stable")
+    # One contiguous row per column, so each slice reduces exactly like the 1-D case.
+    sorted_columns = np.ascontiguousarray(columns[order].T)
+    counts = np.bincount(codes, minlength=n_groups)
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    groups = np.flatnonzero(counts)
+
+    moments = []
+    for sorted_values in sorted_columns:
+        means = np.full(n_groups, np.nan)
+        variances = np.zeros(n_groups)
+        for group in groups:
+            cell = sorted_values[bounds[group] : bounds[group + 1]]
+            means[group] = np.mean(cell)
+            if cell.size > 1:
+                variances[group] = np.var(cell, ddof=1)
+        moments.append(GroupedMoments(counts=counts, means=means, variances=variances))
+    return moments
 
 
 def build_propensity_model() -> Pipeline:
@@ -115,51 +167,267 @@ def _predict_mu_for_treatment(
     return outcome_model.predict(augmented)
 
 
-def compute_dr_scores(
+def _treatment_one_hot_block(outcome_model: Pipeline) -> Optional[Tuple[slice, np.ndarray]]:
+    """Locate the treatment one-hot columns in the fitted preprocessor output, if they are plain."""
+
+    if not isinstance(outcome_model, Pipeline) or len(outcome_model.steps) != 2:
+        return None
+    preprocessor = outcome_model.steps[0][1]
+    if not isinstance(preprocessor, ColumnTransformer):
+        return None
+
+    for name, transformer, columns in preprocessor.transformers_:
+        columns = list(columns) if not isinstance(columns, str) else [columns]
+        if TREATMENT_COL not in columns:
+            continue
+        if not isinstance(transformer, OneHotEncoder):
+            return None
+        if transformer.drop_idx_ is not None or getattr(transformer, "_infrequent_enabled", False):
+            return None
+        col_pos = columns.index(TREATMENT_COL)
+        start = preprocessor.output_indices_[name].start + sum(
+            len(categories) for categories in transformer.categories_[:col_pos]
+        )
+        categories = np.asarray(transformer.categories_[col_pos])
+        return slice(start, start + categories.size), categories
+    return None
+
+
+def predict_counterfactual_outcomes(
+    outcome_model: Pipeline,
+    feature_df: pd.DataFrame,
+    treatment_levels: Iterable[int],
+    batch_rows: int = 131_072,
+) -> np.ndarray:
+    """Predict mu_t for every row and treatment as an `(n_rows, n_treatments)` array.
+
+    For the pipelines built by `build_outcome_model`, features are transformed once, only the
+    treatment one-hot block is rewritten per level, and all levels are scored in one stacked
+    `predict` per batch. Other models fall back to one `predict` per treatment.
+    """
+
+    levels = _sorted_levels(treatment_levels)
+    treatment_block = _treatment_one_hot_block(outcome_model)
+    if treatment_block is None:
+        return np.column_stack(
+            [_predict_mu_for_treatment(outcome_model, feature_df, treatment) for treatment in levels]
+        )
+
+    block, categories = treatment_block
+    preprocessor = outcome_model.steps[0][1]
+    regressor = outcome_model.steps[-1][1]
+    mu = np.empty((len(feature_df), len(levels)), dtype=float)
+
+    for batch_start in range(0, len(feature_df), batch_rows):
+        batch = feature_df.iloc[batch_start : batch_start + batch_rows].assign(**{TREATMENT_COL: levels[0]})
+        design = preprocessor.transform(batch)
+        if hasattr(design, "toarray"):
+            design = design.toarray()
+
+        n_batch = design.shape[0]
+        stacked = np.tile(design, (len(levels), 1))
+        for idx, treatment in enumerate(levels):
+            rows = stacked[idx * n_batch : (idx + 1) * n_batch]
+            rows[:, block] = 0.0
+            matches = np.flatnonzero(categories == treatment)
+            if matches.size:
+                rows[:, block.start + int(matches[0])] = 1.0
+
+        predictions = regressor.predict(stacked)
+        mu[batch_start : batch_start + n_batch] = predictions.reshape(len(levels), n_batch).T
+
+    return mu
+
+
+@dataclass(frozen=True)
+class DRScoreMatrix:
+    """Per-row DR pseudo-outcomes; column `j` holds the scores for `treatment_levels[j]`."""
+
+    treatment_levels: Tuple[int, ...]
+    scores: np.ndarray
+
+    def as_dict(self) -> Dict[int, np.ndarray]:
+        return {treatment: self.scores[:, idx] for idx, treatment in enumerate(self.treatment_levels)}
+
+
+def _sorted_levels(treatment_levels: Iterable[int]) -> Tuple[int, ...]:
+    return tuple(sorted(set(int(t) for t in treatment_levels)))
+
+
+def predict_propensity(
+    df: pd.DataFrame,
+    propensity_model: Pipeline,
+    treatment_levels: Iterable[int],
+    min_propensity: float = 0.02,
+) -> np.ndarray:
+    """Clipped propensities with one column per sorted treatment level.
+
+    Propensities do not depend on the outcome, so callers scoring several outcomes should
+    compute them once and pass them to `compute_dr_score_matrix`.
+    """
+
+    propensity = propensity_model.predict_proba(df[FEATURE_COLUMNS])
+    class_to_index = {int(cls): idx for idx, cls in enumerate(propensity_model.classes_)}
+
+    columns = []
+    for treatment in _sorted_levels(treatment_levels):
+        if treatment not in class_to_index:
+            raise ValueError(f"Propensity model has no class for treatment {treatment}")
+        columns.append(propensity[:, class_to_index[treatment]])
+    return np.clip(np.column_stack(columns), min_propensity, 1.0)
+
+
+def compute_dr_score_matrix(
     df: pd.DataFrame,
     propensity_model: Pipeline,
     outcome_model: Pipeline,
     outcome_col: str,
     treatment_levels: Iterable[int],
     min_propensity: float = 0.02,
-) -> Dict[int, np.ndarray]:
+    propensity: Optional[np.ndarray] = None,
+) -> DRScoreMatrix:
+    levels = _sorted_levels(treatment_levels)
+    if propensity is None:
+        propensity = predict_propensity(df, propensity_model, levels, min_propensity=min_propensity)
+
     feature_df = df[FEATURE_COLUMNS]
     treatment_series = df[TREATMENT_COL].to_numpy(dtype=int)
     outcome = df[outcome_col].to_numpy(dtype=float)
 
-    propensity = propensity_model.predict_proba(feature_df)
-    class_to_index = {int(cls): idx for idx, cls in enumerate(propensity_model.classes_)}
+    mu = predict_counterfactual_outcomes(outcome_model, feature_df, levels)
+    scores = np.empty((len(df), len(levels)), dtype=float)
+    for idx, treatment in enumerate(levels):
+        mu_t = mu[:, idx]
+        is_treatment = (treatment_series == treatment).astype(float)
+        scores[:, idx] = mu_t + (is_treatment / propensity[:, idx]) * (outcome - mu_t)
 
-    scores_by_treatment: Dict[int, np.ndarray] = {}
-    for treatment in sorted(set(int(t) for t in treatment_levels)):
-        if treatment not in class_to_index:
-            raise ValueError(f"Propensity model has no class for treatment {treatment}")
+    return DRScoreMatrix(treatment_levels=levels, scores=scores)
 
-        class_idx = class_to_index[treatment]
-        p_t = np.clip(propensity[:, class_idx], min_propensity, 1.0)
-        mu_t = _predict_mu_for_treatment(outcome_model, feature_df, treatment)
-        is_treatment = (treatment_series == treatment).astype(float)
-        pseudo = mu_t + (is_treatment / p_t) * (outcome - mu_t)
-        scores_by_treatment[treatment] = pseudo.astype(float)
 
-    return scores_by_treatment
+def compute_dr_scores(
+    df: pd.DataFrame,
+    propensity_model: Pipeline,
+    outcome_model: Pipeline,
+    outcome_col: str,
+    treatment_levels: Iterable[int],
+    min_propensity: float = 0.02,
+) -> Dict[int, np.ndarray]:
+    return compute_dr_score_matrix(
+        df=df,
+        propensity_model=propensity_model,
+        outcome_model=outcome_model,
+        outcome_col=outcome_col,
+        treatment_levels=treatment_levels,
+        min_propensity=min_propensity,
+    ).as_dict()
+
+
+def _fit_and_score_fold(
+    df: pd.DataFrame,
+    train_idx: np.ndarray,
+    score_idx: np.ndarray,
+    outcome_cols: Mapping[str, str],
+    treatment_levels: Tuple[int, ...],
+    seed: int,
+    min_propensity: float,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    train_df = df.iloc[train_idx]
+    score_df = df.iloc[score_idx]
+
+    propensity_model = fit_propensity(train_df)
+    propensity = predict_propensity(score_df, propensity_model, treatment_levels, min_propensity=min_propensity)
+    fold_scores: Dict[str, np.ndarray] = {}
+    for idx, (outcome_name, outcome_col) in enumerate(outcome_cols.items()):
+        outcome_model = fit_outcome(train_df, outcome_col, seed=seed + idx + 1)
+        fold_scores[outcome_name] = compute_dr_score_matrix(
+            df=score_df,
+            propensity_model=propensity_model,
+            outcome_model=outcome_model,
+            outcome_col=outcome_col,
+            treatment_levels=treatment_levels,
+            propensity=propensity,
+        ).scores
+    return score_idx, fold_scores
+
+
+def compute_crossfit_dr_scores(
+    df: pd.DataFrame,
+    outcome_cols: Mapping[str, str],
+    treatment_levels: Iterable[int],
+    n_folds: int = 5,
+    seed: int = 0,
+    jobs: int = 1,
+    threads_per_job: Optional[int] = None,
+    min_propensity: float = 0.02,
+) -> Dict[str, DRScoreMatrix]:
+    """K-fold cross-fitted DR scores for every outcome in `outcome_cols` (name -> column).
+
+    Each fold's propensity and outcome models are fit on the other folds and only score the
+    held-out rows, so no row is scored by nuisance models that saw it. Folds are stratified on
+    treatment so every training split covers all levels, and run in parallel via `run_parallel`.
+    """
+
+    if n_folds < 2:
+        raise ValueError("Cross-fitting requires n_folds >= 2")
+    levels = _sorted_levels(treatment_levels)
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    folds = splitter.split(np.zeros(len(df)), df[TREATMENT_COL].to_numpy(dtype=int))
+
+    tasks = [
+        (_fit_and_score_fold, (df, train_idx, score_idx, dict(outcome_cols), levels, seed, min_propensity))
+        for train_idx, score_idx in folds
+    ]
+    merged = {outcome_name: np.empty((len(df), len(levels)), dtype=float) for outcome_name in outcome_cols}
+    for score_idx, fold_scores in run_parallel(tasks, jobs=jobs, threads_per_job=threads_per_job):
+        for outcome_name, scores in fold_scores.items():
+            merged[outcome_name][score_idx] = scores
+
+    return {
+        outcome_name: DRScoreMatrix(treatment_levels=levels, scores=scores)
+        for outcome_name, scores in merged.items()
+    }
+
 
+def _segment_codes(df: pd.DataFrame, segment_by: str) -> Tuple[List[str], np.ndarray]:
+    """Sorted segment labels and the per-row index into them."""
 
-def _segment_masks(df: pd.DataFrame, segment_by: str) -> Dict[str, np.ndarray]:
     if segment_by not in SEGMENT_COLUMNS:
         raise ValueError(f"Unsupported segment_by value: {segment_by}")
     if segment_by == "none":
-        return {"all": np.ones(len(df), dtype=bool)}
+        return ["all"], np.zeros(len(df), dtype=np.intp)
 
     segment_col = SEGMENT_COLUMNS[segment_by]
     segment_values = df[segment_col]
     if segment_values.isna().any():
         raise ValueError(f"Segment column '{segment_col}' contains null values")
 
-    masks: Dict[str, np.ndarray] = {}
-    for value in sorted(segment_values.astype(str).unique()):
-        masks[value] = (segment_values.astype(str) == value).to_numpy()
-    return masks
+    if isinstance(segment_values.dtype, pd.CategoricalDtype):
+        return _observed_category_codes(segment_values)
+
+    codes, labels = pd.factorize(segment_values.astype(str), sort=True)
+    return [str(label) for label in labels], codes.astype(np.intp, copy=False)
+
+
+def _observed_category_codes(segment_values: pd.Series) -> Tuple[List[str], np.ndarray]:
+    """Remap categorical codes onto the observed categories, sorted by label, in O(n)."""
+
+    categories = [str(category) for category in segment_values.cat.categories]
+    raw_codes = segment_values.cat.codes.to_numpy()
+    observed = np.bincount(raw_codes, minlength=len(categories)) > 0
+    kept = [idx for idx in sorted(range(len(categories)), key=categories.__getitem__) if observed[idx]]
+
+    remap = np.full(len(categories), -1, dtype=np.intp)
+    remap[kept] = np.arange(len(kept), dtype=np.intp)
+    return [categories[idx] for idx in kept], remap[raw_codes]
+
+
+def _treatment_codes(df: pd.DataFrame, levels: Tuple[int, ...]) -> np.ndarray:
+    """Index of each row's treatment in `levels`, or -1 for treatments outside it."""
+
+    treatments = df[TREATMENT_COL].to_numpy(dtype=int)
+    level_array = np.asarray(levels, dtype=int)
+    positions = np.clip(np.searchsorted(level_array, treatments), 0, level_array.size - 1)
+    return np.where(level_array[positions] == treatments, positions, -1)
 
 
 def estimate_dr_dose_response(
@@ -170,22 +438,40 @@ def estimate_dr_dose_response(
     segment_by: str,
     treatment_levels: Iterable[int],
 ) -> Dict[str, Dict[int, Dict[str, float]]]:
-    masks = _segment_masks(df, segment_by)
-    dr_scores = compute_dr_scores(
+    segments = _segment_codes(df, segment_by)
+    dr_scores = compute_dr_score_matrix(
         df=df,
         propensity_model=propensity_model,
         outcome_model=outcome_model,
         outcome_col=outcome_col,
         treatment_levels=treatment_levels,
     )
+    return _summarize_scores(segments, dr_scores)
+
+
+def summarize_dr_scores(
+    df: pd.DataFrame,
+    dr_scores: DRScoreMatrix,
+    segment_by: str,
+) -> Dict[str, Dict[int, Dict[str, float]]]:
+    """Segment-level dose response from precomputed scores; no model inference."""
+
+    return _summarize_scores(_segment_codes(df, segment_by), dr_scores)
+
+
+def _summarize_scores(
+    segments: Tuple[List[str], np.ndarray],
+    dr_scores: DRScoreMatrix,
+) -> Dict[str, Dict[int, Dict[str, float]]]:
+    labels, codes = segments
+    moments = grouped_column_moments(codes, len(labels), dr_scores.scores)
 
     response: Dict[str, Dict[int, Dict[str, float]]] = {}
-    for segment_value, mask in masks.items():
-        per_treatment: Dict[int, Dict[str, float]] = {}
-        for treatment, score in dr_scores.items():
-            summary = _summarize(score[mask])
-            per_treatment[treatment] = summary.as_dict()
-        response[segment_value] = per_treatment
+    for segment_idx, segment_value in enumerate(labels):
+        response[segment_value] = {
+            treatment: moments[idx].point(segment_idx).as_dict()
+            for idx, treatment in enumerate(dr_scores.treatment_levels)
+        }
     return response
 
 
@@ -195,26 +481,29 @@ def estimate_naive_dose_response(
     segment_by: str,
     treatment_levels: Iterable[int],
 ) -> Dict[str, Dict[int, Dict[str, float]]]:
-    masks = _segment_masks(df, segment_by)
-    all_treatments = sorted(set(int(t) for t in treatment_levels))
+    labels, segment_codes = _segment_codes(df, segment_by)
+    all_treatments = _sorted_levels(treatment_levels)
+    treatment_codes = _treatment_codes(df, all_treatments)
+    outcome = df[outcome_col].to_numpy(dtype=float)
 
-    global_by_treatment = {
-        treatment: df.loc[df[TREATMENT_COL] == treatment, outcome_col].to_numpy(dtype=float)
-        for treatment in all_treatments
-    }
+    n_treatments = len(all_treatments)
+    cell_codes = np.where(treatment_codes >= 0, segment_codes * n_treatments + treatment_codes, -1)
+    cells = grouped_moments(cell_codes, len(labels) * n_treatments, outcome)
+    global_by_treatment = grouped_moments(treatment_codes, n_treatments, outcome)
 
     response: Dict[str, Dict[int, Dict[str, float]]] = {}
-    for segment_value, mask in masks.items():
-        segment_df = df.loc[mask]
+    for segment_idx, segment_value in enumerate(labels):
         per_treatment: Dict[int, Dict[str, float]] = {}
-        for treatment in all_treatments:
-            observed = segment_df.loc[segment_df[TREATMENT_COL] == treatment, outcome_col].to_numpy(dtype=float)
-            values = observed if observed.size > 0 else global_by_treatment[treatment]
-            if values.size == 0:
+        for treatment_idx, treatment in enumerate(all_treatments):
+            cell = segment_idx * n_treatments + treatment_idx
+            if cells.counts[cell] > 0:
+                summary = cells.point(cell)
+            elif global_by_treatment.counts[treatment_idx] > 0:
+                summary = global_by_treatment.point(treatment_idx)
+            else:
                 raise ValueError(
                     f"No observed rows for treatment {treatment}; cannot compute naive estimate"
                 )
-            summary = _summarize(values)
             per_treatment[treatment] = summary.as_dict()
         response[segment_value] = per_treatment
 
@@ -2,9 +2,9 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Callable, Dict, Iterable
 
-from app.ml.policy import recommend_policy
+from app.ml.policy import compile_policy_table
 
 OBJECTIVES = ("task_success", "safe_value")
 SEGMENTATIONS = ("none", "device_tier", "prompt_risk", "task_domain")
@@ -15,40 +15,64 @@ def _key(objective: str, max_policy_level: int, segment_by: str, method: str) ->
     return f"{objective}|{max_policy_level}|{segment_by}|{method}"
 
 
-def build_static_bundle(
-    dose_response_payload: Dict,
+Recommend = Callable[[str, int, str, str], Dict]
+
+
+def build_recommendation_bundle(
+    artifact_version: str,
     max_policy_levels: Iterable[int],
+    recommend: Recommend,
 ) -> Dict:
-    artifact_version = str(dose_response_payload.get("artifact_version", "unknown"))
+    """Every objective x level x segmentation x method entry, keyed for the static bundle.
+
+    `recommend(objective, max_policy_level, segment_by, method)` returns one entry; the live
+    grid passes the recommend route's own computation, so both answer identically.
+    """
+
+    max_policy_levels = [int(level) for level in max_policy_levels]
     bundle: Dict[str, Dict] = {}
 
     for objective in OBJECTIVES:
         for max_policy_level in max_policy_levels:
             for segment_by in SEGMENTATIONS:
                 for method in METHODS:
-                    recommendation = recommend_policy(
-                        dose_response=dose_response_payload,
-                        objective=objective,
-                        max_policy_level=int(max_policy_level),
-                        segment_by=segment_by,
-                        method=method,
+                    bundle[_key(objective, max_policy_level, segment_by, method)] = recommend(
+                        objective, max_policy_level, segment_by, method
                     )
-                    bundle[_key(objective, int(max_policy_level), segment_by, method)] = {
-                        "artifact_version": artifact_version,
-                        "method_used": method,
-                        "segments": recommendation["segments"],
-                        "dose_response": recommendation["dose_response"],
-                        "baseline": recommendation["baseline"],
-                        "warnings": [],
-                    }
 
     return {
         "artifact_version": artifact_version,
-        "policy_levels": list(max_policy_levels),
+        "policy_levels": max_policy_levels,
         "recommendations": bundle,
     }
 
 
+def build_static_bundle(
+    dose_response_payload: Dict,
+    max_policy_levels: Iterable[int],
+) -> Dict:
+    artifact_version = str(dose_response_payload.get("artifact_version", "unknown"))
+    policy_table = compile_policy_table(dose_response_payload)
+
+    def recommend(objective: str, max_policy_level: int, segment_by: str, method: str) -> Dict:
+        recommendation = policy_table.recommend(
+            objective=objective,
+            max_policy_level=max_policy_level,
+            segment_by=segment_by,
+            method=method,
+        )
+        return {
+            "artifact_version": artifact_version,
+            "method_used": method,
+            "segments": recommendation["segments"],
+            "dose_response": recommendation["dose_response"],
+            "baseline": recommendation["baseline"],
+            "warnings": [],
+        }
+
+    return build_recommendation_bundle(artifact_version, max_policy_levels, recommend)
+
+
 def main() -> None:
     backend_root = Path(__file__).resolve().parents[2]
     repo_root = backend_root.parent
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from joblib import Parallel, delayed, parallel_config
+from threadpoolctl import threadpool_limits
+
+Task = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+def default_threads_per_job(jobs: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(jobs, 1))
+
+
+def run_parallel(tasks: Sequence[Task], jobs: int = 1, threads_per_job: Optional[int] = None) -> List[Any]:
+    """Run `(func, args)` tasks in order, in a loky process pool when `jobs > 1`.
+
+    Each worker's OpenMP/BLAS pools are capped at `threads_per_job` (default: cpu_count // jobs)
+    so nested model parallelism does not oversubscribe cores. Serial runs are only capped
+    when `threads_per_job` is given.
+    """
+
+    if jobs < 1:
+        raise ValueError("jobs must be >= 1")
+    if jobs == 1 or len(tasks) <= 1:
+        if threads_per_job is None:
+            return [func(*args) for func, args in tasks]
+        with threadpool_limits(limits=threads_per_job):
+            return [func(*args) for func, args in tasks]
+
+    if threads_per_job is None:
+        threads_per_job = default_threads_per_job(jobs)
+    with parallel_config(backend="loky", inner_max_num_threads=threads_per_job):
+        return Parallel(n_jobs=min(jobs, len(tasks)))(delayed(func)(*args) for func, args in tasks)
@@ -1,11 +1,27 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, List, Tuple
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from app.ml.data_schema import make_segment_label
 
 SCALE_PER_10K = 10_000.0
 
+POLICY_OUTCOMES: Tuple[str, ...] = ("task_success", "safe_value", "safety_incident", "latency_ms")
+PER_10K_OUTCOMES = frozenset({"task_success", "safe_value", "safety_incident"})
+POLICY_STATS: Tuple[str, ...] = ("mean", "ci_low", "ci_high", "n")
+
+POLICY_TABLE_INDEX = "policy_table.json"
+POLICY_TABLE_ARRAYS = "policy_table.npy"
+POLICY_TABLE_FORMAT_VERSION = 1
+# Channels of the last axis in POLICY_TABLE_ARRAYS: raw stats, then display mean/ci_low/ci_high, then delta.
+_TABLE_CHANNELS = len(POLICY_STATS) + 3 + 1
+
 
 def _as_int_keyed_map(raw: Dict[str, Any]) -> Dict[int, Dict[str, Dict[str, float]]]:
     return {int(k): v for k, v in raw.items()}
@@ -130,3 +146,297 @@ def recommend_policy(
             "policy_level": int(baseline_level),
         },
     }
+
+
+def _round_array(values: np.ndarray) -> np.ndarray:
+    # Python's round() rather than np.round so compiled output matches recommend_policy exactly.
+    return np.array([round(float(value), 2) for value in values.ravel()], dtype=float).reshape(values.shape)
+
+
+@dataclass(frozen=True)
+class PolicyTable:
+    """Dense, precompiled form of a `dose_response` artifact.
+
+    `tensor` is indexed `[segmentation, method, segment, treatment, outcome, stat]` with stats
+    `POLICY_STATS`; segments are padded with NaN up to the largest segmentation. `display` and
+    `delta` hold the rounded values `recommend_policy` would emit: `display[..., outcome, k]`
+    for mean/ci_low/ci_high in response units and `delta[..., outcome]` versus the baseline.
+    """
+
+    treatment_levels: Tuple[int, ...]
+    segmentations: Tuple[str, ...]
+    methods: Tuple[str, ...]
+    outcomes: Tuple[str, ...]
+    segment_values: Dict[str, Tuple[str, ...]]
+    segment_labels: Dict[str, Tuple[str, ...]]
+    errors: Dict[Tuple[str, str], str]
+    tensor: np.ndarray
+    display: np.ndarray
+    delta: np.ndarray
+    baseline_name: str
+    baseline_level: int
+
+    def recommend(
+        self,
+        objective: str,
+        max_policy_level: int,
+        segment_by: str,
+        method: str,
+    ) -> Dict[str, Any]:
+        """Same contract and output as `recommend_policy`, via an argmax over the table."""
+
+        candidates = np.array([level <= max_policy_level for level in self.treatment_levels])
+        if not candidates.any():
+            raise ValueError(
+                f"No policy levels are <= {max_policy_level}. Available levels: {list(self.treatment_levels)}"
+            )
+        if segment_by not in self.segment_values:
+            raise ValueError(f"Unsupported segment_by '{segment_by}' in artifacts")
+        if method not in self.methods and self.segment_values[segment_by]:
+            first_segment = self.segment_values[segment_by][0]
+            raise ValueError(f"Method '{method}' missing in artifact for segment {first_segment}")
+        error = self.errors.get((segment_by, method))
+        if error is not None:
+            raise ValueError(error)
+        if objective not in self.outcomes:
+            raise ValueError(f"Unsupported objective '{objective}' in artifacts")
+
+        baseline = {"name": self.baseline_name, "policy_level": int(self.baseline_level)}
+        n_segments = len(self.segment_values[segment_by])
+        if n_segments == 0:
+            return {"segments": [], "dose_response": [], "baseline": baseline}
+
+        seg_idx = self.segmentations.index(segment_by)
+        method_idx = self.methods.index(method)
+        objective_idx = self.outcomes.index(objective)
+        outcome_idx = [self.outcomes.index(outcome) for outcome in POLICY_OUTCOMES]
+
+        scores = self.tensor[seg_idx, method_idx, :n_segments, :, objective_idx, 0]
+        recommended_idx = np.argmax(np.where(candidates, scores, -np.inf), axis=1)
+        display = self.display[seg_idx, method_idx, :n_segments]
+        delta = self.delta[seg_idx, method_idx, :n_segments]
+
+        segments: List[Dict[str, Any]] = []
+        chart_payload: List[Dict[str, Any]] = []
+        for segment_idx, segment_label in enumerate(self.segment_labels[segment_by]):
+            rec_idx = int(recommended_idx[segment_idx])
+            recommended_level = self.treatment_levels[rec_idx]
+            success, safe_value, incidents, latency = display[segment_idx, rec_idx, outcome_idx, 0].tolist()
+            d_success, d_safe_value, d_incidents, d_latency = delta[segment_idx, rec_idx, outcome_idx].tolist()
+            segments.append(
+                {
+                    "segment": segment_label,
+                    "recommended_policy_level": int(recommended_level),
+                    "expected_successes_per_10k": success,
+                    "expected_safe_value_per_10k": safe_value,
+                    "expected_incidents_per_10k": incidents,
+                    "expected_latency_ms": latency,
+                    "delta_vs_baseline": {
+                        "successes_per_10k": d_success,
+                        "safe_value_per_10k": d_safe_value,
+                        "incidents_per_10k": d_incidents,
+                        "latency_ms": d_latency,
+                        "avg_policy_level": round(float(recommended_level - self.baseline_level), 2),
+                    },
+                }
+            )
+
+            means = display[segment_idx][:, outcome_idx, 0].tolist()
+            ci_bounds = display[segment_idx, :, objective_idx, 1:3].tolist()
+            chart_payload.append(
+                {
+                    "segment": segment_label,
+                    "points": [
+                        {
+                            "policy_level": int(treatment),
+                            "successes_per_10k": point_means[0],
+                            "safe_value_per_10k": point_means[1],
+                            "incidents_per_10k": point_means[2],
+                            "latency_ms": point_means[3],
+                            "ci_low": ci_low,
+                            "ci_high": ci_high,
+                        }
+                        for treatment, point_means, (ci_low, ci_high) in zip(
+                            self.treatment_levels, means, ci_bounds
+                        )
+                    ],
+                }
+            )
+
+        return {
+            "segments": segments,
+            "dose_response": chart_payload,
+            "baseline": baseline,
+        }
+
+
+def compile_policy_table(dose_response: Dict[str, Any]) -> PolicyTable:
+    """Convert `dose_response["segmentations"]` into a `PolicyTable` once per artifact load."""
+
+    treatment_levels = tuple(int(t) for t in dose_response["treatment_levels"])
+    outcomes = tuple(dose_response.get("outcomes") or POLICY_OUTCOMES)
+    missing_outcomes = [outcome for outcome in POLICY_OUTCOMES if outcome not in outcomes]
+    if missing_outcomes:
+        raise ValueError(f"Artifact is missing outcomes required for recommendations: {missing_outcomes}")
+
+    baseline_info = dose_response.get("baseline", {"name": "current_policy", "policy_level": 2})
+    baseline_level = int(baseline_info.get("policy_level", 2))
+    if baseline_level not in treatment_levels:
+        baseline_level = min(treatment_levels, key=lambda t: abs(t - baseline_level))
+    baseline_idx = treatment_levels.index(baseline_level)
+
+    raw_segmentations: Dict[str, Any] = dose_response.get("segmentations", {})
+    segmentations = tuple(raw_segmentations)
+    ordered = {
+        segment_by: [(str(value), entry) for value, entry in _sorted_segments(segment_by, segment_map)]
+        for segment_by, segment_map in raw_segmentations.items()
+    }
+    methods = tuple(
+        sorted({method for entries in ordered.values() for _, entry in entries for method in entry})
+    )
+    max_segments = max((len(entries) for entries in ordered.values()), default=0)
+
+    tensor = np.full(
+        (len(segmentations), len(methods), max_segments, len(treatment_levels), len(outcomes), len(POLICY_STATS)),
+        np.nan,
+    )
+    errors: Dict[Tuple[str, str], str] = {}
+    for seg_idx, segment_by in enumerate(segmentations):
+        for method_idx, method in enumerate(methods):
+            for segment_idx, (segment_value, entry) in enumerate(ordered[segment_by]):
+                error = _fill_segment(
+                    tensor[seg_idx, method_idx, segment_idx],
+                    entry.get(method),
+                    treatment_levels,
+                    outcomes,
+                )
+                if error is not None and (segment_by, method) not in errors:
+                    errors[(segment_by, method)] = error.format(method=method, segment=segment_value)
+
+    scale = np.array([SCALE_PER_10K if outcome in PER_10K_OUTCOMES else 1.0 for outcome in outcomes])
+    display_units = tensor[..., :3] * scale[:, None]
+    means = tensor[..., 0]
+    delta = (means - means[..., baseline_idx : baseline_idx + 1, :]) * scale
+
+    return PolicyTable(
+        treatment_levels=treatment_levels,
+        segmentations=segmentations,
+        methods=methods,
+        outcomes=outcomes,
+        segment_values={segment_by: tuple(value for value, _ in entries) for segment_by, entries in ordered.items()},
+        segment_labels={
+            segment_by: tuple(make_segment_label(segment_by, value) for value, _ in entries)
+            for segment_by, entries in ordered.items()
+        },
+        errors=errors,
+        tensor=tensor,
+        display=_round_array(display_units),
+        delta=_round_array(delta),
+        baseline_name=str(baseline_info.get("name", "current_policy")),
+        baseline_level=baseline_level,
+    )
+
+
+def _fill_segment(
+    target: np.ndarray,
+    method_payload: Optional[Dict[str, Any]],
+    treatment_levels: Tuple[int, ...],
+    outcomes: Tuple[str, ...],
+) -> Optional[str]:
+    if method_payload is None:
+        return "Method '{method}' missing in artifact for segment {segment}"
+
+    treatment_map = _as_int_keyed_map(method_payload)
+    for treatment_idx, treatment in enumerate(treatment_levels):
+        summaries = treatment_map.get(treatment, {})
+        for outcome_idx, outcome in enumerate(outcomes):
+            summary = summaries.get(outcome)
+            if summary is None:
+                return "Method '{method}' is incomplete in artifact for segment {segment}"
+            target[treatment_idx, outcome_idx] = [float(summary.get(stat, np.nan)) for stat in POLICY_STATS]
+    return None
+
+
+def save_policy_table(table: PolicyTable, directory: Path) -> Dict[str, Path]:
+    """Write `table` as a memory-mappable `.npy` plus a small JSON index.
+
+    `tensor`, `display` and `delta` are stacked along the last axis into one float64 array so
+    a single mapping serves every lookup. Returns the written paths keyed by file name.
+    """
+
+    stacked = np.concatenate([table.tensor, table.display, table.delta[..., None]], axis=-1)
+    index = {
+        "format_version": POLICY_TABLE_FORMAT_VERSION,
+        "shape": list(stacked.shape),
+        "treatment_levels": list(table.treatment_levels),
+        "segmentations": list(table.segmentations),
+        "methods": list(table.methods),
+        "outcomes": list(table.outcomes),
+        "stats": list(POLICY_STATS),
+        "segment_values": {key: list(values) for key, values in table.segment_values.items()},
+        "segment_labels": {key: list(values) for key, values in table.segment_labels.items()},
+        "errors": [[segment_by, method, message] for (segment_by, method), message in table.errors.items()],
+        "baseline": {"name": table.baseline_name, "policy_level": table.baseline_level},
+    }
+
+    # Written to temp names and renamed into place: a server may be mapping the previous
+    # file, and rewriting that inode would change (or truncate) the table it is serving.
+    arrays_path = directory / POLICY_TABLE_ARRAYS
+    arrays_tmp = arrays_path.with_name(f".{arrays_path.name}.{os.getpid()}.tmp")
+    with arrays_tmp.open("wb") as handle:
+        np.save(handle, np.ascontiguousarray(stacked, dtype=np.float64), allow_pickle=False)
+    index_path = directory / POLICY_TABLE_INDEX
+    index_tmp = index_path.with_name(f".{index_path.name}.{os.getpid()}.tmp")
+    index_tmp.write_text(json.dumps(index, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(arrays_tmp, arrays_path)
+    os.replace(index_tmp, index_path)
+    return {POLICY_TABLE_ARRAYS: arrays_path, POLICY_TABLE_INDEX: index_path}
+
+
+def load_policy_table(index: Dict[str, Any], arrays_path: Path, mmap: bool = True) -> PolicyTable:
+    """Rebuild a `PolicyTable` from a parsed `policy_table.json` index and its `.npy` file.
+
+    With `mmap`, the arrays are read-only views over a shared file mapping, so worker
+    processes serving the same artifacts share pages instead of each holding a copy.
+    """
+
+    if index.get("format_version") != POLICY_TABLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported policy table format_version {index.get('format_version')!r}")
+    if tuple(index.get("stats", ())) != POLICY_STATS:
+        raise ValueError(f"Policy table stats {index.get('stats')} do not match {list(POLICY_STATS)}")
+
+    stacked = np.load(arrays_path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    treatment_levels = tuple(int(level) for level in index["treatment_levels"])
+    segmentations = tuple(index["segmentations"])
+    methods = tuple(index["methods"])
+    outcomes = tuple(index["outcomes"])
+    segment_values = {key: tuple(values) for key, values in index["segment_values"].items()}
+    max_segments = max((len(values) for values in segment_values.values()), default=0)
+    expected_shape = (
+        len(segmentations),
+        len(methods),
+        max_segments,
+        len(treatment_levels),
+        len(outcomes),
+        _TABLE_CHANNELS,
+    )
+    if stacked.shape != expected_shape or list(stacked.shape) != list(index["shape"]):
+        raise ValueError(f"Policy table arrays have shape {stacked.shape}, index expects {expected_shape}")
+    if stacked.dtype != np.float64:
+        raise ValueError(f"Policy table arrays have dtype {stacked.dtype}, expected float64")
+
+    n_stats = len(POLICY_STATS)
+    return PolicyTable(
+        treatment_levels=treatment_levels,
+        segmentations=segmentations,
+        methods=methods,
+        outcomes=outcomes,
+        segment_values=segment_values,
+        segment_labels={key: tuple(values) for key, values in index["segment_labels"].items()},
+        errors={(segment_by, method): message for segment_by, method, message in index["errors"]},
+        tensor=stacked[..., :n_stats],
+        display=stacked[..., n_stats : n_stats + 3],
+        delta=stacked[..., n_stats + 3],
+        baseline_name=str(index["baseline"]["name"]),
+        baseline_level=int(index["baseline"]["policy_level"]),
+    )
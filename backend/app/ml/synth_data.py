@@ -1,16 +1,28 @@
 from __future__ import annotations
 
-from typing import Iterable
+import argparse
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, Iterable, Iterator, List, Optional
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from app.ml.data_schema import (
+    CATEGORY_DTYPES,
+    CATEGORY_LEVELS,
     INCIDENT_COL,
     LATENCY_COL,
     SAFE_VALUE_COL,
     SUCCESS_COL,
     TREATMENT_COL,
+    category_code,
 )
 
 
@@ -24,45 +36,125 @@ def _sigmoid(values: np.ndarray) -> np.ndarray:
     return 1.0 / (1.0 + np.exp(-values))
 
 
+def _draw_codes(rng: np.random.Generator, col: str, probs: List[float], n_rows: int) -> np.ndarray:
+    return rng.choice(len(CATEGORY_LEVELS[col]), size=n_rows, p=probs)
+
+
+def _is(codes: np.ndarray, col: str, value: str) -> np.ndarray:
+    return (codes == CATEGORY_LEVELS[col].index(value)).astype(float)
+
+
+def _lookup(codes: np.ndarray, col: str, mapping: Dict[str, float]) -> np.ndarray:
+    return np.array([mapping[level] for level in CATEGORY_LEVELS[col]], dtype=float)[codes]
+
+
+def _sample_levels_vectorized(rng: np.random.Generator, assignment_prob: np.ndarray) -> np.ndarray:
+    """Inverse-CDF sampling with one uniform draw per row."""
+
+    cdf = np.cumsum(assignment_prob, axis=1)
+    cdf /= cdf[:, -1:]
+    draws = rng.random(assignment_prob.shape[0])[:, None]
+    sampled_idx = (draws >= cdf).sum(axis=1)
+    return np.minimum(sampled_idx, assignment_prob.shape[1] - 1)
+
+
+def _sample_levels_legacy(rng: np.random.Generator, assignment_prob: np.ndarray) -> np.ndarray:
+    """Per-row `rng.choice`; slow, but reproduces artifacts built before vectorized sampling."""
+
+    n_levels = assignment_prob.shape[1]
+    return np.array(
+        [rng.choice(n_levels, p=assignment_prob[row_idx]) for row_idx in range(assignment_prob.shape[0])],
+        dtype=int,
+    )
+
+
+SAMPLERS = {
+    "vectorized": _sample_levels_vectorized,
+    "legacy": _sample_levels_legacy,
+}
+
+# Rows per independently seeded block in the chunked generator. Block `i` draws from
+# `SeedSequence(seed).spawn(...)[i]`, so output never depends on how blocks are re-chunked.
+SYNTH_BLOCK_ROWS = 65_536
+DEFAULT_CHUNK_ROWS = 262_144
+DEFAULT_PART_ROWS = 4_194_304
+
+# Analytic 0.72 quantile of the prompt token distribution. The in-memory generator uses the
+# empirical quantile of the full frame; chunked generation cannot see the full frame.
+LONG_PROMPT_TOKEN_THRESHOLD = float(math.exp(5.5 + 0.42 * NormalDist().inv_cdf(0.72)))
+
+
+def _resolve_levels(treatment_levels: Iterable[int]) -> np.ndarray:
+    levels = np.array(sorted(set(int(x) for x in treatment_levels)), dtype=int)
+    if levels.size < 2:
+        raise ValueError("At least two treatment levels are required")
+    return levels
+
+
+def _validate_sampler(sampler: str) -> None:
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler '{sampler}'. Expected one of: {sorted(SAMPLERS)}")
+
+
 def generate_synthetic_data(
     n_rows: int = 65_000,
     seed: int = 17,
     treatment_levels: Iterable[int] = (0, 1, 2, 3, 4),
+    sampler: str = "vectorized",
 ) -> pd.DataFrame:
-    """Generate confounded on-device policy logs for a guardrail optimization demo."""
+    """Generate confounded on-device policy logs for a guardrail optimization demo.
 
-    rng = np.random.default_rng(seed)
-    levels = np.array(sorted(set(int(x) for x in treatment_levels)), dtype=int)
-    if levels.size < 2:
-        raise ValueError("At least two treatment levels are required")
+    `sampler="legacy"` draws treatments row by row exactly as earlier releases did, so
+    artifact hashes produced before the vectorized sampler can still be reproduced.
+    """
 
-    device_tier = rng.choice(["entry", "mid", "premium"], size=n_rows, p=[0.33, 0.46, 0.21])
-    prompt_risk = rng.choice(["low", "medium", "high"], size=n_rows, p=[0.53, 0.32, 0.15])
-    task_domain = rng.choice(["assistant", "code", "support"], size=n_rows, p=[0.45, 0.26, 0.29])
-    region = rng.choice(["NA", "EU", "APAC", "LATAM"], size=n_rows, p=[0.31, 0.26, 0.28, 0.15])
-    connectivity = rng.choice(["offline", "poor", "good"], size=n_rows, p=[0.22, 0.31, 0.47])
+    _validate_sampler(sampler)
+    levels = _resolve_levels(treatment_levels)
+    return _simulate_logs(
+        rng=np.random.default_rng(seed),
+        n_rows=n_rows,
+        levels=levels,
+        sampler=sampler,
+        long_prompt_threshold=None,
+    )
+
+
+def _simulate_logs(
+    rng: np.random.Generator,
+    n_rows: int,
+    levels: np.ndarray,
+    sampler: str,
+    long_prompt_threshold: Optional[float],
+) -> pd.DataFrame:
+    device_tier = _draw_codes(rng, "device_tier", [0.33, 0.46, 0.21], n_rows)
+    prompt_risk = _draw_codes(rng, "prompt_risk", [0.53, 0.32, 0.15], n_rows)
+    task_domain = _draw_codes(rng, "task_domain", [0.45, 0.26, 0.29], n_rows)
+    region = _draw_codes(rng, "region", [0.31, 0.26, 0.28, 0.15], n_rows)
+    connectivity = _draw_codes(rng, "connectivity", [0.22, 0.31, 0.47], n_rows)
 
     prompt_tokens = np.clip(rng.lognormal(mean=5.5, sigma=0.42, size=n_rows), 40, 1150)
     battery_pct = rng.uniform(8, 100, size=n_rows)
     thermal_headroom = np.clip(rng.normal(loc=10.5, scale=4.2, size=n_rows), 0.8, 24)
+    if long_prompt_threshold is None:
+        long_prompt_threshold = float(np.quantile(prompt_tokens, 0.72))
 
     model_size_b = np.select(
-        [device_tier == "entry", device_tier == "mid", device_tier == "premium"],
+        [device_tier == category_code("device_tier", tier) for tier in ("entry", "mid", "premium")],
         [rng.normal(2.1, 0.3, size=n_rows), rng.normal(6.9, 0.6, size=n_rows), rng.normal(12.4, 0.8, size=n_rows)],
     )
     model_size_b = np.clip(model_size_b, 1.1, 15.0)
 
-    device_score = pd.Series(device_tier).map({"entry": -0.28, "mid": 0.0, "premium": 0.24}).to_numpy()
-    risk_score = pd.Series(prompt_risk).map({"low": -0.78, "medium": 0.0, "high": 1.02}).to_numpy()
-    domain_score = pd.Series(task_domain).map({"assistant": 0.05, "code": 0.16, "support": -0.04}).to_numpy()
-    conn_score = pd.Series(connectivity).map({"offline": -0.22, "poor": -0.08, "good": 0.08}).to_numpy()
-    region_score = pd.Series(region).map({"NA": 0.08, "EU": 0.05, "APAC": 0.0, "LATAM": -0.07}).to_numpy()
+    device_score = _lookup(device_tier, "device_tier", {"entry": -0.28, "mid": 0.0, "premium": 0.24})
+    risk_score = _lookup(prompt_risk, "prompt_risk", {"low": -0.78, "medium": 0.0, "high": 1.02})
+    domain_score = _lookup(task_domain, "task_domain", {"assistant": 0.05, "code": 0.16, "support": -0.04})
+    conn_score = _lookup(connectivity, "connectivity", {"offline": -0.22, "poor": -0.08, "good": 0.08})
+    region_score = _lookup(region, "region", {"NA": 0.08, "EU": 0.05, "APAC": 0.0, "LATAM": -0.07})
 
     latent_risk_need = (
         0.78 * risk_score
-        + 0.20 * (prompt_tokens > np.quantile(prompt_tokens, 0.72)).astype(float)
+        + 0.20 * (prompt_tokens > long_prompt_threshold).astype(float)
         + 0.12 * (battery_pct < 32).astype(float)
-        + 0.10 * (connectivity != "good").astype(float)
+        + 0.10 * (1.0 - _is(connectivity, "connectivity", "good"))
         - 0.08 * device_score
         + rng.normal(0, 0.25, size=n_rows)
     )
@@ -74,20 +166,17 @@ def generate_synthetic_data(
         logits[:, idx] = (
             -0.42 * np.square(level - 0.52)
             + 1.15 * level * latent_risk_need
-            + 0.36 * level * (device_tier == "entry").astype(float)
-            + 0.25 * level * (task_domain == "support").astype(float)
+            + 0.36 * level * _is(device_tier, "device_tier", "entry")
+            + 0.25 * level * _is(task_domain, "task_domain", "support")
             + 0.22 * level * (battery_pct < 28).astype(float)
-            - 0.22 * level * (prompt_risk == "low").astype(float)
+            - 0.22 * level * _is(prompt_risk, "prompt_risk", "low")
         )
 
     assignment_prob = _softmax(logits)
-    sampled_idx = np.array(
-        [rng.choice(levels.size, p=assignment_prob[row_idx]) for row_idx in range(n_rows)],
-        dtype=int,
-    )
+    sampled_idx = SAMPLERS[sampler](rng, assignment_prob)
     policy_level = levels[sampled_idx]
 
-    risk_weight = pd.Series(prompt_risk).map({"low": 0.24, "medium": 0.72, "high": 1.32}).to_numpy()
+    risk_weight = _lookup(prompt_risk, "prompt_risk", {"low": 0.24, "medium": 0.72, "high": 1.32})
     strictness = policy_level.astype(float)
 
     safety_gain = 0.86 * (1.0 - np.exp(-strictness / 1.35)) * risk_weight
@@ -113,7 +202,7 @@ def generate_synthetic_data(
         -2.45
         + 1.55 * risk_weight
         + 0.28 * (prompt_tokens > 450).astype(float)
-        + 0.18 * (connectivity == "offline").astype(float)
+        + 0.18 * _is(connectivity, "connectivity", "offline")
         - 1.20 * safety_gain
         + 0.16 * overblock_penalty
         + rng.normal(0, 0.2, size=n_rows)
@@ -125,9 +214,9 @@ def generate_synthetic_data(
         56.0
         + 0.052 * prompt_tokens
         + 15.5 * strictness
-        + 8.8 * (device_tier == "entry").astype(float)
-        - 7.2 * (device_tier == "premium").astype(float)
-        + 3.5 * (connectivity == "offline").astype(float)
+        + 8.8 * _is(device_tier, "device_tier", "entry")
+        - 7.2 * _is(device_tier, "device_tier", "premium")
+        + 3.5 * _is(connectivity, "connectivity", "offline")
         + rng.normal(0, 3.9, size=n_rows)
     )
     latency_ms = np.clip(latency_ms, 32.0, 420.0)
@@ -136,8 +225,8 @@ def generate_synthetic_data(
         21.0
         + 0.034 * prompt_tokens
         + 5.3 * strictness
-        + 4.6 * (device_tier == "entry").astype(float)
-        - 3.6 * (device_tier == "premium").astype(float)
+        + 4.6 * _is(device_tier, "device_tier", "entry")
+        - 3.6 * _is(device_tier, "device_tier", "premium")
         + rng.normal(0, 2.2, size=n_rows)
     )
     power_mwh = np.clip(power_mwh, 7.0, 260.0)
@@ -151,11 +240,11 @@ def generate_synthetic_data(
 
     return pd.DataFrame(
         {
-            "device_tier": device_tier,
-            "prompt_risk": prompt_risk,
-            "task_domain": task_domain,
-            "region": region,
-            "connectivity": connectivity,
+            "device_tier": pd.Categorical.from_codes(device_tier, dtype=CATEGORY_DTYPES["device_tier"]),
+            "prompt_risk": pd.Categorical.from_codes(prompt_risk, dtype=CATEGORY_DTYPES["prompt_risk"]),
+            "task_domain": pd.Categorical.from_codes(task_domain, dtype=CATEGORY_DTYPES["task_domain"]),
+            "region": pd.Categorical.from_codes(region, dtype=CATEGORY_DTYPES["region"]),
+            "connectivity": pd.Categorical.from_codes(connectivity, dtype=CATEGORY_DTYPES["connectivity"]),
             "prompt_tokens": prompt_tokens.round(2),
             "battery_pct": battery_pct.round(2),
             "thermal_headroom": thermal_headroom.round(2),
@@ -168,3 +257,194 @@ def generate_synthetic_data(
             "power_mwh": power_mwh.round(4),
         }
     )
+
+
+def _generate_block(
+    seed: int,
+    block_idx: int,
+    block_rows: int,
+    levels: np.ndarray,
+    sampler: str,
+) -> pd.DataFrame:
+    block_seed = np.random.SeedSequence(seed, spawn_key=(block_idx,))
+    return _simulate_logs(
+        rng=np.random.default_rng(block_seed),
+        n_rows=block_rows,
+        levels=levels,
+        sampler=sampler,
+        long_prompt_threshold=LONG_PROMPT_TOKEN_THRESHOLD,
+    )
+
+
+def iter_synthetic_chunks(
+    n_rows: int,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    seed: int = 17,
+    treatment_levels: Iterable[int] = (0, 1, 2, 3, 4),
+    sampler: str = "vectorized",
+    start_row: int = 0,
+    stop_row: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield rows `[start_row, stop_row)` of an `n_rows` dataset in frames of `chunk_rows`.
+
+    Peak memory is bounded by `chunk_rows + SYNTH_BLOCK_ROWS` rows. Concatenating the chunks
+    gives the same frame for every `chunk_rows`, but not the same frame as
+    `generate_synthetic_data`, which seeds a single stream over the whole dataset.
+    """
+
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows must be positive")
+    _validate_sampler(sampler)
+    levels = _resolve_levels(treatment_levels)
+    stop_row = n_rows if stop_row is None else min(stop_row, n_rows)
+    if start_row < 0 or start_row > stop_row:
+        raise ValueError(f"Invalid row range [{start_row}, {stop_row}) for {n_rows} rows")
+
+    pending: Optional[pd.DataFrame] = None
+    first_block = start_row // SYNTH_BLOCK_ROWS
+    last_block = math.ceil(stop_row / SYNTH_BLOCK_ROWS)
+    for block_idx in range(first_block, last_block):
+        block_start = block_idx * SYNTH_BLOCK_ROWS
+        block_rows = min(SYNTH_BLOCK_ROWS, n_rows - block_start)
+        block = _generate_block(seed, block_idx, block_rows, levels, sampler)
+        block = block.iloc[max(start_row - block_start, 0) : min(stop_row - block_start, block_rows)]
+
+        pending = block if pending is None else pd.concat([pending, block], ignore_index=True)
+        offset = 0
+        while len(pending) - offset >= chunk_rows:
+            yield pending.iloc[offset : offset + chunk_rows].reset_index(drop=True)
+            offset += chunk_rows
+        pending = pending.iloc[offset:]
+
+    if pending is not None and len(pending) > 0:
+        yield pending.reset_index(drop=True)
+
+
+def _part_path(output_dir: Path, part_idx: int) -> Path:
+    return output_dir / f"part-{part_idx:05d}.parquet"
+
+
+def write_synthetic_part(
+    output_dir: Path,
+    part_idx: int,
+    n_rows: int,
+    seed: int = 17,
+    treatment_levels: Iterable[int] = (0, 1, 2, 3, 4),
+    sampler: str = "vectorized",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    part_rows: int = DEFAULT_PART_ROWS,
+) -> Path:
+    """Stream one part file of the dataset, one row group per chunk."""
+
+    part_path = _part_path(output_dir, part_idx)
+    writer: Optional[pq.ParquetWriter] = None
+    try:
+        for chunk in iter_synthetic_chunks(
+            n_rows=n_rows,
+            chunk_rows=chunk_rows,
+            seed=seed,
+            treatment_levels=treatment_levels,
+            sampler=sampler,
+            start_row=part_idx * part_rows,
+            stop_row=(part_idx + 1) * part_rows,
+        ):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(part_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return part_path
+
+
+def write_synthetic_parquet(
+    output_dir: Path,
+    n_rows: int,
+    seed: int = 17,
+    treatment_levels: Iterable[int] = (0, 1, 2, 3, 4),
+    sampler: str = "vectorized",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    part_rows: int = DEFAULT_PART_ROWS,
+    workers: int = 1,
+) -> List[Path]:
+    """Write a partitioned Parquet dataset (`part-00000.parquet`, ...) without materializing it.
+
+    Parts are cut at fixed row offsets and each is generated from its own spawned block seeds,
+    so fanning them out to `workers` processes yields byte-identical files for any worker count.
+    """
+
+    if n_rows <= 0:
+        raise ValueError("n_rows must be positive")
+    if part_rows <= 0:
+        raise ValueError("part_rows must be positive")
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for stale_part in output_dir.glob("part-*.parquet"):
+        stale_part.unlink()
+
+    write_part = partial(
+        write_synthetic_part,
+        output_dir,
+        n_rows=n_rows,
+        seed=seed,
+        treatment_levels=tuple(treatment_levels),
+        sampler=sampler,
+        chunk_rows=chunk_rows,
+        part_rows=part_rows,
+    )
+    part_indices = range(math.ceil(n_rows / part_rows))
+    if workers == 1 or len(part_indices) == 1:
+        return [write_part(part_idx) for part_idx in part_indices]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(part_indices))) as executor:
+        return list(executor.map(write_part, part_indices))
+
+
+def read_synthetic_parquet(part_paths: Iterable[Path]) -> pd.DataFrame:
+    return pd.concat([pd.read_parquet(path) for path in sorted(part_paths)], ignore_index=True)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a partitioned synthetic EdgeAlign-DR dataset")
+    parser.add_argument("--rows", type=int, default=65_000)
+    parser.add_argument("--seed", type=int, default=17)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--part-rows", type=int, default=DEFAULT_PART_ROWS)
+    parser.add_argument("--sampler", choices=sorted(SAMPLERS), default="vectorized")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path(__file__).resolve().parents[1] / "artifacts" / "synthetic",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    part_paths = write_synthetic_parquet(
+        output_dir=args.output,
+        n_rows=args.rows,
+        seed=args.seed,
+        sampler=args.sampler,
+        chunk_rows=args.chunk_rows,
+        part_rows=args.part_rows,
+        workers=args.workers,
+    )
+    print(
+        json.dumps(
+            {
+                "rows": args.rows,
+                "seed": args.seed,
+                "workers": args.workers,
+                "parts": [str(path) for path in part_paths],
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ import hashlib
 import json
 from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 import joblib
 import pandas as pd
@@ -17,16 +17,28 @@ from app.ml.data_schema import (
     SEGMENT_COLUMNS,
     SUCCESS_COL,
     DataSchema,
+    encode_categoricals,
     validate_dataframe,
 )
 from app.ml.dr_estimator import (
+    DRScoreMatrix,
     combine_dose_responses,
-    estimate_dr_dose_response,
+    compute_crossfit_dr_scores,
+    compute_dr_score_matrix,
     estimate_naive_dose_response,
     fit_outcome,
     fit_propensity,
+    predict_propensity,
+    summarize_dr_scores,
+)
+from app.ml.parallel import run_parallel
+from app.ml.policy import compile_policy_table, save_policy_table
+from app.ml.synth_data import (
+    SAMPLERS,
+    generate_synthetic_data,
+    read_synthetic_parquet,
+    write_synthetic_parquet,
 )
-from app.ml.synth_data import generate_synthetic_data
 
 DEFAULT_TREATMENT_LEVELS = (0, 1, 2, 3, 4)
 
@@ -51,11 +63,57 @@ def _sha256_json(payload: Dict[str, Any]) -> str:
     return hashlib.sha256(blob).hexdigest()
 
 
-def _build_segment_payload(
+def _fit_model(df: pd.DataFrame, outcome_col: Optional[str], seed: int):
+    if outcome_col is None:
+        return fit_propensity(df)
+    return fit_outcome(df, outcome_col, seed=seed)
+
+
+def fit_models(
+    df: pd.DataFrame,
+    seed: int,
+    jobs: int = 1,
+    threads_per_job: Optional[int] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Fit the propensity model and one outcome model per entry in OUTCOMES.
+
+    With `jobs > 1` the fits run concurrently through `run_parallel`. Every model keeps its
+    fixed seed, so results match `jobs=1`.
+    """
+
+    tasks = [(_fit_model, (df, None, seed))] + [
+        (_fit_model, (df, outcome_col, seed + idx + 1)) for idx, outcome_col in enumerate(OUTCOMES.values())
+    ]
+    models = run_parallel(tasks, jobs=jobs, threads_per_job=threads_per_job)
+
+    propensity_model, *outcome_list = models
+    return propensity_model, dict(zip(OUTCOMES.keys(), outcome_list))
+
+
+def _compute_outcome_scores(
     df: pd.DataFrame,
     treatment_levels: Iterable[int],
     propensity_model,
     outcome_models: Dict[str, Any],
+) -> Dict[str, DRScoreMatrix]:
+    propensity = predict_propensity(df, propensity_model, treatment_levels)
+    return {
+        outcome_name: compute_dr_score_matrix(
+            df=df,
+            propensity_model=propensity_model,
+            outcome_model=outcome_models[outcome_name],
+            outcome_col=outcome_col,
+            treatment_levels=treatment_levels,
+            propensity=propensity,
+        )
+        for outcome_name, outcome_col in OUTCOMES.items()
+    }
+
+
+def _build_segment_payload(
+    df: pd.DataFrame,
+    treatment_levels: Iterable[int],
+    dr_scores: Dict[str, DRScoreMatrix],
 ) -> Dict[str, Any]:
     segmentations: Dict[str, Any] = {}
 
@@ -69,13 +127,10 @@ def _build_segment_payload(
                 segment_by=segment_by,
                 treatment_levels=treatment_levels,
             )
-            dr_response = estimate_dr_dose_response(
+            dr_response = summarize_dr_scores(
                 df=df,
-                propensity_model=propensity_model,
-                outcome_model=outcome_models[outcome_name],
-                outcome_col=outcome_col,
+                dr_scores=dr_scores[outcome_name],
                 segment_by=segment_by,
-                treatment_levels=treatment_levels,
             )
             dose_inputs[outcome_name] = {
                 "naive": naive_response,
@@ -100,26 +155,76 @@ def build_artifacts(
     seed: int,
     treatment_levels: Iterable[int] = DEFAULT_TREATMENT_LEVELS,
     artifact_version: str | None = None,
+    sampler: str = "vectorized",
+    chunk_rows: Optional[int] = None,
+    jobs: int = 1,
+    threads_per_job: Optional[int] = None,
+    crossfit_folds: int = 0,
 ) -> Dict[str, Any]:
+    """Train models and write the artifact directory.
+
+    With `chunk_rows`, the dataset is generated in bounded-memory chunks and streamed to a
+    partitioned `demo/` Parquet dataset instead of a single `demo.parquet` file. With
+    `crossfit_folds >= 2`, DR scores come from K-fold cross-fitted nuisance models; the
+    full-data models are still fit and saved.
+    """
+
     artifact_dir.mkdir(parents=True, exist_ok=True)
     treatment_levels = tuple(sorted(set(int(x) for x in treatment_levels)))
     if artifact_version is None:
         artifact_version = date.today().isoformat()
 
-    df = generate_synthetic_data(n_rows=rows, seed=seed, treatment_levels=treatment_levels)
+    dataset_files: Dict[str, Path] = {}
+    if chunk_rows is None:
+        df = generate_synthetic_data(
+            n_rows=rows,
+            seed=seed,
+            treatment_levels=treatment_levels,
+            sampler=sampler,
+        )
+    else:
+        dataset_dir = artifact_dir / "demo"
+        part_paths = write_synthetic_parquet(
+            output_dir=dataset_dir,
+            n_rows=rows,
+            seed=seed,
+            treatment_levels=treatment_levels,
+            sampler=sampler,
+            chunk_rows=chunk_rows,
+        )
+        dataset_files = {f"demo/{path.name}": path for path in part_paths}
+        df = read_synthetic_parquet(part_paths)
+    df = encode_categoricals(df)
     validate_dataframe(df, DataSchema(treatment_levels=list(treatment_levels)))
 
-    propensity_model = fit_propensity(df)
-    outcome_models = {
-        outcome_name: fit_outcome(df, outcome_col, seed=seed + idx + 1)
-        for idx, (outcome_name, outcome_col) in enumerate(OUTCOMES.items())
-    }
+    propensity_model, outcome_models = fit_models(
+        df=df,
+        seed=seed,
+        jobs=jobs,
+        threads_per_job=threads_per_job,
+    )
 
+    if crossfit_folds:
+        dr_scores = compute_crossfit_dr_scores(
+            df=df,
+            outcome_cols=OUTCOMES,
+            treatment_levels=treatment_levels,
+            n_folds=crossfit_folds,
+            seed=seed,
+            jobs=jobs,
+            threads_per_job=threads_per_job,
+        )
+    else:
+        dr_scores = _compute_outcome_scores(
+            df=df,
+            treatment_levels=treatment_levels,
+            propensity_model=propensity_model,
+            outcome_models=outcome_models,
+        )
     segmentations = _build_segment_payload(
         df=df,
         treatment_levels=treatment_levels,
-        propensity_model=propensity_model,
-        outcome_models=outcome_models,
+        dr_scores=dr_scores,
     )
 
     dose_response_payload = {
@@ -135,17 +240,20 @@ def build_artifacts(
         "policy_level": 2,
     }
 
-    dataset_path = artifact_dir / "demo.parquet"
     propensity_path = artifact_dir / "propensity_model.joblib"
     outcome_path = artifact_dir / "outcome_model.joblib"
     dose_response_path = artifact_dir / "dose_response.json"
     baseline_path = artifact_dir / "policy_baselines.json"
 
-    df.to_parquet(dataset_path, index=False)
+    if chunk_rows is None:
+        dataset_path = artifact_dir / "demo.parquet"
+        df.to_parquet(dataset_path, index=False)
+        dataset_files = {"demo.parquet": dataset_path}
     joblib.dump(propensity_model, propensity_path)
     joblib.dump(outcome_models, outcome_path)
     dose_response_path.write_text(json.dumps(dose_response_payload, indent=2, sort_keys=True), encoding="utf-8")
     baseline_path.write_text(json.dumps(baselines_payload, indent=2, sort_keys=True), encoding="utf-8")
+    policy_table_files = save_policy_table(compile_policy_table(dose_response_payload), artifact_dir)
 
     reproducible_hash_payload = {
         "seed": seed,
@@ -156,11 +264,12 @@ def build_artifacts(
     artifact_hash = _sha256_json(reproducible_hash_payload)
 
     file_hashes = {
-        "demo.parquet": _sha256_file(dataset_path),
+        **{name: _sha256_file(path) for name, path in dataset_files.items()},
         "propensity_model.joblib": _sha256_file(propensity_path),
         "outcome_model.joblib": _sha256_file(outcome_path),
         "dose_response.json": _sha256_file(dose_response_path),
         "policy_baselines.json": _sha256_file(baseline_path),
+        **{name: _sha256_file(path) for name, path in policy_table_files.items()},
     }
 
     manifest = {
@@ -168,6 +277,9 @@ def build_artifacts(
         "created_at_utc": datetime.now(timezone.utc).isoformat(),
         "seed": seed,
         "rows": rows,
+        "sampler": sampler,
+        "generator": "in_memory" if chunk_rows is None else "chunked",
+        "crossfit_folds": crossfit_folds,
         "treatment_levels": list(treatment_levels),
         "has_dr": True,
         "artifact_hash": artifact_hash,
@@ -184,6 +296,31 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--rows", type=int, default=65_000)
     parser.add_argument("--seed", type=int, default=17)
     parser.add_argument("--artifact-version", type=str, default=None)
+    parser.add_argument(
+        "--sampler",
+        choices=sorted(SAMPLERS),
+        default="vectorized",
+        help="Treatment sampler; use 'legacy' to reproduce artifacts built before vectorized sampling",
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=None,
+        help="Generate data in chunks of this many rows and stream it to a partitioned demo/ dataset",
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="Fit models concurrently in this many processes")
+    parser.add_argument(
+        "--crossfit-folds",
+        type=int,
+        default=0,
+        help="Cross-fit DR nuisance models over this many folds (0 disables cross-fitting)",
+    )
+    parser.add_argument(
+        "--threads-per-job",
+        type=int,
+        default=None,
+        help="OpenMP/BLAS threads per fitting process (default: cpu_count // jobs)",
+    )
     parser.add_argument(
         "--artifact-dir",
         type=Path,
@@ -199,6 +336,11 @@ def main() -> None:
         rows=args.rows,
         seed=args.seed,
         artifact_version=args.artifact_version,
+        sampler=args.sampler,
+        chunk_rows=args.chunk_rows,
+        jobs=args.jobs,
+        threads_per_job=args.threads_per_job,
+        crossfit_folds=args.crossfit_folds,
     )
     print(json.dumps(manifest, indent=2, sort_keys=True))
 
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.cache import ArtifactBundle, ArtifactCache
+from app.ml.train import build_artifacts
+
+DEFAULT_THREADS = (1, 2, 4, 8, 16, 32)
+
+
+class LockedArtifactCache(ArtifactCache):
+    """The previous read path: every `get` takes the lock, loaded or not."""
+
+    def get(self, artifact_dir: Path) -> ArtifactBundle:
+        with self._lock:
+            state = self._state
+            if state is not None and state[0] == artifact_dir:
+                return state[1]
+        return super().get(artifact_dir)
+
+
+def bench_reads(cache: ArtifactCache, artifact_dir: Path, threads: int, reads_per_thread: int) -> Dict[str, Any]:
+    cache.get(artifact_dir)
+    start = threading.Barrier(threads + 1)
+
+    def reader() -> None:
+        get = cache.get
+        start.wait()
+        for _ in range(reads_per_thread):
+            get(artifact_dir)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(reader) for _ in range(threads)]
+        start.wait()
+        started = time.perf_counter()
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - started
+
+    total = threads * reads_per_thread
+    return {
+        "cache": "locked" if isinstance(cache, LockedArtifactCache) else "lock_free",
+        "threads": threads,
+        "seconds": round(elapsed, 4),
+        "reads_per_second": round(total / elapsed, 1),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent ArtifactCache reads")
+    parser.add_argument("--threads", type=int, nargs="+", default=list(DEFAULT_THREADS))
+    parser.add_argument("--reads-per-thread", type=int, default=100_000)
+    parser.add_argument(
+        "--artifact-dir",
+        type=Path,
+        default=None,
+        help="Existing artifact directory; a small one is trained into a temp dir when omitted",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_dir: Optional[Path] = args.artifact_dir
+        if artifact_dir is None:
+            artifact_dir = Path(tmp) / "artifacts"
+            build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=17, artifact_version="bench")
+
+        for cache_cls in (LockedArtifactCache, ArtifactCache):
+            for threads in args.threads:
+                result = bench_reads(cache_cls(), artifact_dir, threads, args.reads_per_thread)
+                print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import FastAPI, Request, Response
+
+from app.api.routes import _compute_entry, _get_artifacts, _render_body
+from app.api.schemas import RecommendRequest
+from app.core.cache import artifact_cache, response_cache
+from app.core.config import get_settings
+from app.ml.train import build_artifacts
+
+DEFAULT_CONCURRENCY = (1, 8, 32, 128)
+SYNC_PATH = "/bench/sync-recommend"
+ASYNC_PATH = "/api/v1/recommend"
+PAYLOAD = {"objective": "task_success", "max_policy_level": 3, "segment_by": "prompt_risk", "method": "dr"}
+
+
+def sync_recommend(payload: RecommendRequest, request: Request) -> Response:
+    """The previous `def` route: every call, hit or miss, goes through Starlette's threadpool."""
+
+    artifacts = _get_artifacts()
+    cache_key = payload.cache_key()
+    scope = str(artifacts.manifest.get("artifact_hash", "unknown"))
+    cached = response_cache.get(cache_key, scope=scope)
+    if cached is None:
+        cached = _compute_entry(
+            artifacts,
+            payload.objective,
+            payload.max_policy_level,
+            payload.segment_by,
+            payload.method,
+        )
+        response_cache.set(cache_key, cached, scope=scope)
+    return Response(
+        content=_render_body(cached["body_prefix"], getattr(request.state, "request_id", None)),
+        media_type="application/json",
+    )
+
+
+async def bench_route(app: FastAPI, path: str, concurrency: int, requests_per_worker: int) -> Dict[str, Any]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post(path, json=PAYLOAD)
+
+        async def worker() -> None:
+            for _ in range(requests_per_worker):
+                response = await client.post(path, json=PAYLOAD)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = concurrency * requests_per_worker
+    return {
+        "route": "sync" if path == SYNC_PATH else "async",
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 4),
+        "requests_per_second": round(total / elapsed, 1),
+    }
+
+
+def build_app(artifact_dir: Path) -> FastAPI:
+    os.environ["ARTIFACT_DIR"] = str(artifact_dir)
+    get_settings.cache_clear()
+    artifact_cache.clear()
+    response_cache.clear()
+
+    from app.main import create_app
+
+    app = create_app()
+    # Per-request access logs would dominate the measurement; keep only warnings and up.
+    logging.disable(logging.INFO)
+    app.add_api_route(SYNC_PATH, sync_recommend, methods=["POST"])
+    # ASGITransport does not run the lifespan, so load (and warm) artifacts up front.
+    artifact_cache.get(artifact_dir)
+    return app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the sync and async recommend routes on cache hits")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(DEFAULT_CONCURRENCY))
+    parser.add_argument("--requests-per-worker", type=int, default=200)
+    parser.add_argument(
+        "--artifact-dir",
+        type=Path,
+        default=None,
+        help="Existing artifact directory; a small one is trained into a temp dir when omitted",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_dir: Optional[Path] = args.artifact_dir
+        if artifact_dir is None:
+            artifact_dir = Path(tmp) / "artifacts"
+            build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=17, artifact_version="bench")
+
+        app = build_app(artifact_dir.resolve())
+        for path in (SYNC_PATH, ASYNC_PATH):
+            for concurrency in args.concurrency:
+                result = asyncio.run(bench_route(app, path, concurrency, args.requests_per_worker))
+                print(json.dumps(result))
+        app.state.cold_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+from typing import Any, Callable, Dict
+
+from app.api.schemas import RecommendRequest
+
+ARTIFACT_HASH = "0" * 64
+
+
+def json_key(payload: RecommendRequest, method: str) -> str:
+    """The per-request key the recommend route built before tuple keys."""
+
+    return json.dumps(
+        {
+            "objective": payload.objective,
+            "max_policy_level": payload.max_policy_level,
+            "segment_by": payload.segment_by,
+            "method": method,
+            "artifact_hash": ARTIFACT_HASH,
+        },
+        sort_keys=True,
+    )
+
+
+def tuple_key(payload: RecommendRequest, method: str) -> Any:
+    return payload.cache_key(method)
+
+
+def _warm_store(build_key: Callable[[RecommendRequest, str], Any]) -> Dict[Any, bytes]:
+    store: Dict[Any, bytes] = {}
+    for objective in ("task_success", "safe_value"):
+        for level in range(5):
+            for segment_by in ("none", "device_tier", "prompt_risk", "task_domain"):
+                for method in ("naive", "dr"):
+                    payload = RecommendRequest(
+                        objective=objective,
+                        max_policy_level=level,
+                        segment_by=segment_by,
+                        method=method,
+                    )
+                    store[build_key(payload, method)] = b"{}"
+    return store
+
+
+def bench_key(name: str, build_key: Callable[[RecommendRequest, str], Any], number: int) -> Dict[str, Any]:
+    store = _warm_store(build_key)
+    payload = RecommendRequest(objective="safe_value", max_policy_level=3, segment_by="device_tier", method="dr")
+
+    build_seconds = min(timeit.repeat(lambda: build_key(payload, "dr"), number=number, repeat=5))
+    lookup_seconds = min(timeit.repeat(lambda: store[build_key(payload, "dr")], number=number, repeat=5))
+    return {
+        "key": name,
+        "build_ns": round(build_seconds / number * 1e9, 1),
+        "build_and_lookup_ns": round(lookup_seconds / number * 1e9, 1),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark response cache key construction")
+    parser.add_argument("--number", type=int, default=200_000)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    for name, build_key in (("json", json_key), ("tuple", tuple_key)):
+        print(json.dumps(bench_key(name, build_key, args.number)))
+
+
+if __name__ == "__main__":
+    main()
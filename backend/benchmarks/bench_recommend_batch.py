@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from app.ml.train import build_artifacts
+from benchmarks.bench_async_recommend import build_app
+
+DEFAULT_BATCH_SIZES = (1, 10, 40, 100)
+
+
+def dashboard_payloads(count: int) -> List[Dict[str, Any]]:
+    """`count` side-by-side configurations, cycling through the grid like the dashboard does."""
+
+    grid = itertools.product(
+        ("task_success", "safe_value"),
+        (0, 1, 2, 3, 4),
+        ("none", "device_tier", "prompt_risk", "task_domain"),
+        ("naive", "dr"),
+    )
+    combos = [
+        {"objective": objective, "max_policy_level": level, "segment_by": segment_by, "method": method}
+        for objective, level, segment_by, method in grid
+    ]
+    return [combos[index % len(combos)] for index in range(count)]
+
+
+async def bench_batch(app: FastAPI, batch_size: int, rounds: int) -> List[Dict[str, Any]]:
+    payloads = dashboard_payloads(batch_size)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def singles() -> None:
+            for payload in payloads:
+                (await client.post("/api/v1/recommend", json=payload)).raise_for_status()
+
+        async def batch() -> None:
+            (await client.post("/api/v1/recommend:batch", json={"requests": payloads})).raise_for_status()
+
+        results = []
+        for mode, call in (("single", singles), ("batch", batch)):
+            await call()
+            started = time.perf_counter()
+            for _ in range(rounds):
+                await call()
+            elapsed = time.perf_counter() - started
+            results.append(
+                {
+                    "mode": mode,
+                    "batch_size": batch_size,
+                    "ms_per_round": round(elapsed / rounds * 1000, 3),
+                    "recommendations_per_second": round(batch_size * rounds / elapsed, 1),
+                }
+            )
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark one batch recommend call against N single calls")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument(
+        "--artifact-dir",
+        type=Path,
+        default=None,
+        help="Existing artifact directory; a small one is trained into a temp dir when omitted",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact_dir: Optional[Path] = args.artifact_dir
+        if artifact_dir is None:
+            artifact_dir = Path(tmp) / "artifacts"
+            build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=17, artifact_version="bench")
+
+        app = build_app(artifact_dir.resolve())
+        for batch_size in args.batch_sizes:
+            for result in asyncio.run(bench_batch(app, batch_size, args.rounds)):
+                print(json.dumps(result))
+        app.state.cold_executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
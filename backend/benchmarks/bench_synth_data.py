@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from app.ml.synth_data import SAMPLERS, generate_synthetic_data
+
+DEFAULT_ROWS = (65_000, 1_000_000, 10_000_000)
+
+
+def bench_generate(rows: int, sampler: str, seed: int, repeats: int) -> Dict[str, Any]:
+    timings: List[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        generate_synthetic_data(n_rows=rows, seed=seed, sampler=sampler)
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    return {
+        "rows": rows,
+        "sampler": sampler,
+        "best_seconds": round(best, 4),
+        "rows_per_second": round(rows / best, 1),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark synthetic data generation throughput")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--samplers", nargs="+", choices=sorted(SAMPLERS), default=["vectorized"])
+    parser.add_argument(
+        "--legacy-max-rows",
+        type=int,
+        default=65_000,
+        help="Skip the per-row legacy sampler above this size; it takes minutes at 1M rows",
+    )
+    parser.add_argument("--seed", type=int, default=17)
+    parser.add_argument("--repeats", type=int, default=1)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    for sampler in args.samplers:
+        for rows in args.rows:
+            if sampler == "legacy" and rows > args.legacy_max_rows:
+                continue
+            result = bench_generate(rows=rows, sampler=sampler, seed=args.seed, repeats=args.repeats)
+            print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
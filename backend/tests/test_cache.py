@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.cache import ArtifactCache, ResponseCache
+from app.ml.train import build_artifacts
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _entry(size: int) -> dict:
+    return {"body_prefix": b"x" * size, "warnings": []}
+
+
+def test_response_cache_evicts_least_recently_used_entries() -> None:
+    cache = ResponseCache(max_entries=2, max_bytes=1_000)
+    cache.set("a", _entry(10))
+    cache.set("b", _entry(10))
+    assert cache.get("a") is not None
+
+    cache.set("c", _entry(10))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["entries"]) == (3, 1, 1, 2)
+
+
+def test_response_cache_enforces_byte_budget() -> None:
+    cache = ResponseCache(max_entries=10, max_bytes=100)
+    cache.set("a", _entry(60))
+    cache.set("b", _entry(60))
+    cache.set("too_big", _entry(101))
+
+    assert not cache.contains("a")
+    assert cache.contains("b")
+    assert not cache.contains("too_big")
+    assert cache.stats()["bytes"] == 60
+    assert cache.stats()["evictions"] == 2
+
+
+def test_response_cache_expires_entries_after_ttl() -> None:
+    clock = FakeClock()
+    cache = ResponseCache(ttl_seconds=5.0, clock=clock)
+    cache.set("a", _entry(1))
+
+    clock.now = 4.9
+    assert cache.get("a") is not None
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_response_cache_drops_superseded_artifact_scopes() -> None:
+    cache = ResponseCache()
+    cache.activate_scope("hash-1")
+    cache.set("a", _entry(1), scope="hash-1")
+
+    cache.activate_scope("hash-2")
+    cache.set("late-write", _entry(1), scope="hash-1")
+    cache.set("a", _entry(2), scope="hash-2")
+
+    assert cache.get("a", scope="hash-1") is None
+    assert cache.get("a", scope="hash-2")["body_prefix"] == b"xx"
+    assert not cache.contains("late-write", scope="hash-1")
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_response_cache_warms_a_new_scope_next_to_the_served_one() -> None:
+    cache = ResponseCache()
+    cache.activate_scope("hash-1")
+    cache.set("a", _entry(1), scope="hash-1")
+
+    cache.add_scope("hash-2")
+    cache.set("a", _entry(2), scope="hash-2")
+
+    assert cache.get("a", scope="hash-1")["body_prefix"] == b"x"
+    assert cache.get("a", scope="hash-2")["body_prefix"] == b"xx"
+
+    cache.activate_scope("hash-2")
+    assert cache.get("a", scope="hash-1") is None
+    assert len(cache) == 1
+
+
+def test_artifact_cache_loads_once_and_reads_without_the_lock(tmp_path) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=5, artifact_version="test-cache")
+    cache = ArtifactCache()
+    loads = []
+    cache.add_load_hook(loads.append)
+    start = threading.Barrier(8)
+
+    def first_get():
+        start.wait()
+        return cache.get(artifact_dir)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        bundles = list(pool.map(lambda _: first_get(), range(8)))
+
+    assert len(loads) == 1
+    assert all(bundle is loads[0] for bundle in bundles)
+
+    with cache._lock:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(cache.get, artifact_dir).result(timeout=5) is loads[0]
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import gzip
+
+import pytest
+
+from app.core.compression import compress_variants, encode_prefix, negotiate_encoding
+
+VARIANTS = {"identity": b"{}", "gzip": b"gz", "br": b"br"}
+
+
+def test_compress_variants_round_trip_and_are_deterministic() -> None:
+    body = b'{"points":' + b"[1.0,2.0,3.0]," * 200 + b"[]}"
+
+    variants = compress_variants(body)
+
+    assert variants["identity"] == body
+    assert gzip.decompress(variants["gzip"]) == body
+    assert len(variants["gzip"]) < len(body)
+    assert compress_variants(body)["gzip"] == variants["gzip"]
+
+
+def test_negotiate_encoding_prefers_brotli_and_honours_weights() -> None:
+    assert negotiate_encoding(None, VARIANTS) == "identity"
+    assert negotiate_encoding("gzip, deflate, br", VARIANTS) == "br"
+    assert negotiate_encoding("br;q=0.5, gzip", VARIANTS) == "gzip"
+    assert negotiate_encoding("br;q=0, gzip;q=0", VARIANTS) == "identity"
+    assert negotiate_encoding("*", VARIANTS) == "br"
+    assert negotiate_encoding("deflate", VARIANTS) == "identity"
+    assert negotiate_encoding("br", {"identity": b"{}", "gzip": b"gz"}) == "identity"
+
+
+@pytest.mark.parametrize("tail", [b"null}", b'"req-\\"1\\""}', b"x" * 65_535])
+def test_encoded_prefix_splices_tail_without_recompressing(tail) -> None:
+    prefix = b'{"dose_response":' + b'{"policy_level":1,"ci_low":0.5},' * 300 + b'"request_id":'
+
+    variants = encode_prefix(prefix)
+
+    assert gzip.decompress(variants["gzip"].render(tail)) == prefix + tail
+    if "br" in variants:
+        brotli = pytest.importorskip("brotli")
+        assert brotli.decompress(variants["br"].render(tail)) == prefix + tail
+    assert variants["gzip"].render(b"x" * 65_536) is None
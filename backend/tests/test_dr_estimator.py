@@ -1,11 +1,35 @@
 from __future__ import annotations
 
+from typing import List
+
 import numpy as np
 import pandas as pd
 import pytest
+from threadpoolctl import threadpool_info
 
-from app.ml.data_schema import FEATURE_COLUMNS, SUCCESS_COL, TREATMENT_COL
-from app.ml.dr_estimator import compute_dr_scores, estimate_dr_dose_response
+from app.ml.data_schema import (
+    FEATURE_COLUMNS,
+    SUCCESS_COL,
+    TREATMENT_COL,
+    DataSchema,
+    encode_categoricals,
+    validate_dataframe,
+)
+from app.ml.dr_estimator import (
+    compute_crossfit_dr_scores,
+    compute_dr_score_matrix,
+    compute_dr_scores,
+    estimate_dr_dose_response,
+    estimate_naive_dose_response,
+    fit_outcome,
+    fit_propensity,
+    grouped_column_moments,
+    grouped_moments,
+    predict_counterfactual_outcomes,
+    predict_propensity,
+    summarize_dr_scores,
+)
+from app.ml.parallel import run_parallel
 from app.ml.train import build_artifacts
 
 
@@ -22,6 +46,15 @@ class OracleOutcomeModel:
         return 0.18 + 0.07 * policy_level
 
 
+class CountingOutcomeModel(OracleOutcomeModel):
+    def __init__(self) -> None:
+        self.predict_calls = 0
+
+    def predict(self, features: pd.DataFrame) -> np.ndarray:
+        self.predict_calls += 1
+        return super().predict(features)
+
+
 class _UnusedModel:
     pass
 
@@ -83,6 +116,132 @@ def test_dr_errors_when_segment_column_has_missing_values() -> None:
         )
 
 
+def test_precomputed_scores_match_per_segmentation_estimates() -> None:
+    df = _minimal_feature_frame(rows=180)
+    rng = np.random.default_rng(7)
+    df[TREATMENT_COL] = rng.choice([0, 1, 2], size=len(df))
+    df[SUCCESS_COL] = rng.binomial(1, 0.4, size=len(df))
+
+    propensity_model = UniformPropensityModel()
+    outcome_model = CountingOutcomeModel()
+    propensity = predict_propensity(df, propensity_model, [0, 1, 2])
+    score_matrix = compute_dr_score_matrix(
+        df=df,
+        propensity_model=propensity_model,
+        outcome_model=outcome_model,
+        outcome_col=SUCCESS_COL,
+        treatment_levels=[0, 1, 2],
+        propensity=propensity,
+    )
+    assert outcome_model.predict_calls == 3
+
+    for segment_by in ("none", "device_tier", "prompt_risk"):
+        expected = estimate_dr_dose_response(
+            df=df,
+            propensity_model=propensity_model,
+            outcome_model=OracleOutcomeModel(),
+            outcome_col=SUCCESS_COL,
+            segment_by=segment_by,
+            treatment_levels=[0, 1, 2],
+        )
+        assert summarize_dr_scores(df=df, dr_scores=score_matrix, segment_by=segment_by) == expected
+    assert outcome_model.predict_calls == 3
+
+
+def test_batched_counterfactual_predictions_match_per_treatment_predict() -> None:
+    df = _minimal_feature_frame(rows=400)
+    rng = np.random.default_rng(12)
+    df[TREATMENT_COL] = rng.choice([0, 1, 2, 3], size=len(df))
+    df[SUCCESS_COL] = rng.binomial(1, 0.3 + 0.1 * df[TREATMENT_COL].to_numpy())
+    outcome_model = fit_outcome(df, SUCCESS_COL, seed=3)
+
+    batched = predict_counterfactual_outcomes(
+        outcome_model,
+        df[FEATURE_COLUMNS],
+        treatment_levels=[0, 1, 2, 3, 4],
+        batch_rows=150,
+    )
+
+    assert batched.shape == (len(df), 5)
+    for idx, treatment in enumerate([0, 1, 2, 3, 4]):
+        expected = outcome_model.predict(df[FEATURE_COLUMNS].assign(**{TREATMENT_COL: treatment}))
+        np.testing.assert_array_equal(batched[:, idx], expected)
+
+
+def test_grouped_moments_match_per_group_mean_and_variance() -> None:
+    rng = np.random.default_rng(31)
+    codes = rng.integers(-1, 6, size=5_000)
+    values = rng.normal(size=codes.size)
+
+    moments = grouped_moments(codes, 7, values)
+
+    for group in range(7):
+        members = values[codes == group]
+        assert moments.counts[group] == members.size
+        if members.size:
+            assert moments.means[group] == np.mean(members)
+        if members.size > 1:
+            assert moments.variances[group] == np.var(members, ddof=1)
+
+    columns = np.column_stack([values, rng.normal(size=codes.size), values[::-1]])
+    for idx, column_moments in enumerate(grouped_column_moments(codes, 7, columns)):
+        expected = grouped_moments(codes, 7, np.ascontiguousarray(columns[:, idx]))
+        np.testing.assert_array_equal(column_moments.counts, expected.counts)
+        np.testing.assert_array_equal(column_moments.means, expected.means)
+        np.testing.assert_array_equal(column_moments.variances, expected.variances)
+
+
+def test_naive_dose_response_falls_back_to_global_for_empty_cells() -> None:
+    df = _minimal_feature_frame(rows=200)
+    rng = np.random.default_rng(2)
+    df[TREATMENT_COL] = rng.choice([0, 1, 2], size=len(df))
+    df.loc[df["device_tier"] == "entry", TREATMENT_COL] = 1
+    df[SUCCESS_COL] = rng.normal(size=len(df))
+
+    response = estimate_naive_dose_response(
+        df=df,
+        outcome_col=SUCCESS_COL,
+        segment_by="device_tier",
+        treatment_levels=[0, 1, 2],
+    )
+
+    assert sorted(response) == ["entry", "mid"]
+    for segment_value, per_treatment in response.items():
+        segment_df = df[df["device_tier"] == segment_value]
+        for treatment, summary in per_treatment.items():
+            observed = segment_df.loc[segment_df[TREATMENT_COL] == treatment, SUCCESS_COL]
+            if observed.empty:
+                observed = df.loc[df[TREATMENT_COL] == treatment, SUCCESS_COL]
+            assert summary["n"] == len(observed)
+            np.testing.assert_allclose(summary["mean"], observed.mean(), rtol=1e-12)
+            margin = 1.96 * observed.std(ddof=1) / np.sqrt(len(observed))
+            np.testing.assert_allclose(summary["ci_high"] - summary["mean"], margin, rtol=1e-9)
+
+
+def test_categorical_segments_match_object_segments() -> None:
+    df = _minimal_feature_frame(rows=150)
+    rng = np.random.default_rng(5)
+    df[TREATMENT_COL] = rng.choice([0, 1, 2], size=len(df))
+    df[SUCCESS_COL] = rng.normal(size=len(df))
+    encoded = encode_categoricals(df)
+
+    assert isinstance(encoded["device_tier"].dtype, pd.CategoricalDtype)
+    for segment_by in ("device_tier", "prompt_risk", "task_domain"):
+        expected = estimate_naive_dose_response(df, SUCCESS_COL, segment_by, [0, 1, 2])
+        assert estimate_naive_dose_response(encoded, SUCCESS_COL, segment_by, [0, 1, 2]) == expected
+
+
+def test_validate_dataframe_rejects_unknown_categories() -> None:
+    df = _minimal_feature_frame(rows=20)
+    df[TREATMENT_COL] = 1
+    for col in ("task_success", "safe_value", "safety_incident", "latency_ms"):
+        df[col] = 0.0
+    df.loc[0, "region"] = "MARS"
+
+    with pytest.raises(ValueError, match="Column 'region' contains unknown categories: \\['MARS'\\]"):
+        validate_dataframe(df, DataSchema(treatment_levels=[0, 1, 2]))
+
+
 def test_artifact_hash_is_deterministic_for_same_seed(tmp_path) -> None:
     manifest_a = build_artifacts(
         artifact_dir=tmp_path / "run_a",
@@ -100,3 +259,63 @@ def test_artifact_hash_is_deterministic_for_same_seed(tmp_path) -> None:
     )
 
     assert manifest_a["artifact_hash"] == manifest_b["artifact_hash"]
+
+
+# Produced by the pre-vectorization pipeline (baseline) for rows=3000, seed=17.
+LEGACY_GOLDEN_HASH = "e770deb598726944589d1f51aa90d0045c32ad1683785f9439c0c536c1204ce7"
+
+
+def test_legacy_sampler_reproduces_baseline_artifact_hash(tmp_path) -> None:
+    manifest = build_artifacts(
+        artifact_dir=tmp_path / "legacy",
+        rows=3000,
+        seed=17,
+        artifact_version="golden",
+        sampler="legacy",
+    )
+
+    assert manifest["artifact_hash"] == LEGACY_GOLDEN_HASH
+
+
+def test_parallel_model_fitting_matches_serial_artifact_hash(tmp_path) -> None:
+    options = dict(rows=2000, seed=23, treatment_levels=[0, 1, 2, 3, 4], artifact_version="test-version")
+    serial = build_artifacts(artifact_dir=tmp_path / "serial", jobs=1, **options)
+    parallel = build_artifacts(artifact_dir=tmp_path / "parallel", jobs=2, threads_per_job=1, **options)
+
+    assert serial["artifact_hash"] == parallel["artifact_hash"]
+
+
+def test_crossfit_scores_use_out_of_fold_models_and_are_parallel_safe() -> None:
+    df = _minimal_feature_frame(rows=600)
+    rng = np.random.default_rng(17)
+    df[TREATMENT_COL] = rng.choice([0, 1, 2], size=len(df))
+    df[SUCCESS_COL] = rng.binomial(1, 0.35, size=len(df))
+    outcome_cols = {"task_success": SUCCESS_COL}
+
+    serial = compute_crossfit_dr_scores(df, outcome_cols, [0, 1, 2], n_folds=3, seed=4, jobs=1)
+    parallel = compute_crossfit_dr_scores(df, outcome_cols, [0, 1, 2], n_folds=3, seed=4, jobs=2, threads_per_job=1)
+
+    scores = serial["task_success"]
+    assert scores.treatment_levels == (0, 1, 2)
+    assert scores.scores.shape == (len(df), 3)
+    assert np.isfinite(scores.scores).all()
+    np.testing.assert_array_equal(scores.scores, parallel["task_success"].scores)
+
+    in_sample = compute_dr_score_matrix(
+        df=df,
+        propensity_model=fit_propensity(df),
+        outcome_model=fit_outcome(df, SUCCESS_COL, seed=5),
+        outcome_col=SUCCESS_COL,
+        treatment_levels=[0, 1, 2],
+    )
+    assert not np.allclose(scores.scores, in_sample.scores)
+
+
+def _pool_sizes() -> List[int]:
+    return [pool["num_threads"] for pool in threadpool_info()]
+
+
+def test_serial_run_parallel_honours_threads_per_job() -> None:
+    (capped,) = run_parallel([(_pool_sizes, ())], jobs=1, threads_per_job=1)
+
+    assert capped and set(capped) == {1}
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app.core.cache import ArtifactCache
+from app.core.loader import ArtifactIntegrityError, load_artifact_bundle
+from app.ml.policy import load_policy_table
+from app.ml.train import build_artifacts
+
+
+def _tamper(path) -> None:
+    with path.open("ab") as handle:
+        handle.write(b" ")
+
+
+def test_loader_defers_heavy_components_and_times_each_load(tmp_path) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=3, artifact_version="lazy")
+
+    bundle = load_artifact_bundle(artifact_dir)
+
+    assert set(bundle.load_timings_ms) == {"manifest", "baselines", "policy_table"}
+    assert bundle.dose_response is None
+    assert bundle.components.dose_response()["artifact_version"] == "lazy"
+    assert len(bundle.components.dataset()) == 4_000
+    assert set(bundle.components.outcome_models()) == {"task_success", "safe_value", "safety_incident", "latency_ms"}
+    assert bundle.components.dataset() is bundle.components.dataset()
+    assert {"dataset", "outcome_models"} <= set(bundle.load_timings_ms)
+    assert "propensity_model" not in bundle.load_timings_ms
+
+    _tamper(artifact_dir / "propensity_model.joblib")
+    with pytest.raises(ArtifactIntegrityError, match="propensity_model.joblib"):
+        bundle.components.propensity_model()
+
+
+def test_integrity_failure_keeps_previous_bundle(tmp_path) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=3, artifact_version="v1")
+    cache = ArtifactCache()
+    first = cache.get(artifact_dir)
+
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=4, artifact_version="v2")
+    _tamper(artifact_dir / "policy_table.npy")
+
+    with pytest.raises(ArtifactIntegrityError, match="policy_table.npy"):
+        cache.reload(artifact_dir)
+    assert cache.current() is first
+
+    with pytest.raises(ValueError):
+        ArtifactCache().get(artifact_dir)
+
+
+def test_binary_policy_table_matches_json_fallback(tmp_path) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=3, artifact_version="binary")
+    binary = load_artifact_bundle(artifact_dir)
+    assert isinstance(binary.policy_table.tensor, np.memmap)
+
+    (artifact_dir / "policy_table.json").unlink()
+    (artifact_dir / "policy_table.npy").unlink()
+    fallback = load_artifact_bundle(artifact_dir)
+    assert fallback.dose_response is not None
+
+    for objective in ("task_success", "safe_value"):
+        for segment_by in ("none", "device_tier", "prompt_risk", "task_domain"):
+            for method in ("naive", "dr"):
+                assert binary.policy_table.recommend(objective, 3, segment_by, method) == (
+                    fallback.policy_table.recommend(objective, 3, segment_by, method)
+                )
+
+    with pytest.raises(ValueError, match="format_version"):
+        load_policy_table({"format_version": 99}, artifact_dir / "missing.npy")
+
+
+def test_retraining_in_place_leaves_the_served_table_untouched(tmp_path) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=3, artifact_version="served")
+    bundle = load_artifact_bundle(artifact_dir)
+    before = np.array(bundle.policy_table.tensor)
+    query = {"objective": "task_success", "max_policy_level": 4, "segment_by": "task_domain", "method": "dr"}
+    answer = bundle.policy_table.recommend(**query)
+
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=99, artifact_version="retrained")
+
+    np.testing.assert_array_equal(bundle.policy_table.tensor, before)
+    assert bundle.policy_table.recommend(**query) == answer
+    assert not list(artifact_dir.glob(".*.tmp"))
+    assert load_artifact_bundle(artifact_dir).manifest["artifact_version"] == "retrained"
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+import os
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.logging import configure_logging, shutdown_logging
+from app.core.middleware import RequestContextMiddleware, next_request_id
+
+
+def test_log_records_are_written_by_the_listener_thread() -> None:
+    stream = io.StringIO()
+    writers = []
+
+    class RecordingStream(io.StringIO):
+        def write(self, text: str) -> int:
+            writers.append(threading.current_thread().name)
+            return stream.write(text)
+
+    configure_logging("prod", stream=RecordingStream())
+    try:
+        logging.getLogger("edgealign.test").info("hello", extra={"request_id": "r-1", "duration_ms": 1.5})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.getLogger("edgealign.test").exception("failed")
+    finally:
+        shutdown_logging()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["message"] for line in lines] == ["hello", "failed"]
+    assert lines[0]["request_id"] == "r-1"
+    assert lines[0]["timestamp"].endswith("+00:00")
+    assert "ValueError: boom" in lines[1]["exc_info"]
+    assert threading.main_thread().name not in writers
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_restarts_the_listener(tmp_path) -> None:
+    log_path = tmp_path / "app.log"
+    with log_path.open("a", buffering=1, encoding="utf-8") as stream:
+        configure_logging("prod", stream=stream)
+        try:
+            logging.getLogger("edgealign.test").info("from_parent")
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    logging.getLogger("edgealign.test").info("from_child")
+                    shutdown_logging()
+                finally:
+                    os._exit(0)
+            os.waitpid(pid, 0)
+        finally:
+            shutdown_logging()
+
+    messages = [json.loads(line)["message"] for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert sorted(messages) == ["from_child", "from_parent"]
+
+
+def _client(sample_rate: float, records: list) -> TestClient:
+    class ListHandler(logging.Handler):
+        def emit(self, record: logging.LogRecord) -> None:
+            records.append(record)
+
+    logger = logging.getLogger(f"edgealign.test.access.{sample_rate}")
+    logger.handlers = [ListHandler()]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        return {"ok": True}
+
+    @app.get("/boom")
+    async def boom() -> dict:
+        raise RuntimeError("boom")
+
+    app.add_middleware(RequestContextMiddleware, logger=logger, sample_rate=sample_rate)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_request_context_middleware_sets_ids_and_samples_access_logs() -> None:
+    records: list = []
+    client = _client(1.0, records)
+
+    echoed = client.get("/ping", headers={"X-Request-Id": "given-1"})
+    generated = client.get("/ping")
+
+    assert echoed.headers["x-request-id"] == "given-1"
+    assert generated.headers["x-request-id"] != next_request_id()
+    assert [(record.getMessage(), record.status_code) for record in records] == [
+        ("request_completed", 200),
+        ("request_completed", 200),
+    ]
+    assert records[0].request_id == "given-1"
+
+    sampled_out: list = []
+    client = _client(0.0, sampled_out)
+    assert client.get("/ping").status_code == 200
+    assert client.get("/boom").status_code == 500
+    assert [record.getMessage() for record in sampled_out] == ["request_failed"]
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from app.core.metrics import MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets_and_escaped_labels() -> None:
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo latency.", labels=("route",), buckets=(0.1, 1.0))
+    requests = registry.counter("demo_total", "Demo requests.", labels=("route",))
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, '/a"b')
+    requests.inc("/a", amount=2)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{route="/a\\"b",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a\\"b",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 4' in lines
+    assert 'demo_seconds_sum{route="/a\\"b"} 3.65' in lines
+    assert 'demo_seconds_count{route="/a\\"b"} 4' in lines
+    assert 'demo_total{route="/a"} 2' in lines
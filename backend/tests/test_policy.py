@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from app.ml.policy import POLICY_OUTCOMES, compile_policy_table, recommend_policy
+
+SEGMENT_VALUES = {
+    "none": ["all"],
+    "device_tier": ["entry", "mid", "premium"],
+    "prompt_risk": ["low", "medium", "high"],
+}
+
+
+def _summary(rng: np.random.Generator, outcome: str) -> Dict[str, float]:
+    mean = float(rng.uniform(40, 180) if outcome == "latency_ms" else rng.uniform(0, 1))
+    margin = float(rng.uniform(0, 0.05))
+    return {"mean": mean, "ci_low": mean - margin, "ci_high": mean + margin, "n": 100}
+
+
+def _dose_response_payload(seed: int = 3) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    segmentations: Dict[str, Any] = {}
+    for segment_by, values in SEGMENT_VALUES.items():
+        segmentations[segment_by] = {
+            value: {
+                method: {
+                    str(level): {outcome: _summary(rng, outcome) for outcome in POLICY_OUTCOMES}
+                    for level in range(5)
+                }
+                for method in ("naive", "dr")
+            }
+            for value in values
+        }
+    return {
+        "treatment_levels": [0, 1, 2, 3, 4],
+        "baseline": {"name": "current_policy", "policy_level": 2},
+        "outcomes": list(POLICY_OUTCOMES),
+        "segmentations": segmentations,
+    }
+
+
+def test_compiled_table_matches_recommend_policy_for_every_query() -> None:
+    payload = _dose_response_payload()
+    table = compile_policy_table(payload)
+
+    for objective in ("task_success", "safe_value"):
+        for max_policy_level in range(5):
+            for segment_by in SEGMENT_VALUES:
+                for method in ("naive", "dr"):
+                    expected = recommend_policy(payload, objective, max_policy_level, segment_by, method)
+                    assert table.recommend(objective, max_policy_level, segment_by, method) == expected
+
+
+def test_compiled_table_raises_like_recommend_policy() -> None:
+    payload = _dose_response_payload()
+    del payload["segmentations"]["prompt_risk"]["medium"]["dr"]
+    table = compile_policy_table(payload)
+
+    with pytest.raises(ValueError, match="Method 'dr' missing in artifact for segment medium"):
+        table.recommend("task_success", 3, "prompt_risk", "dr")
+    with pytest.raises(ValueError, match="Unsupported segment_by 'task_domain'"):
+        table.recommend("task_success", 3, "task_domain", "dr")
+    with pytest.raises(ValueError, match="No policy levels are <= -1"):
+        table.recommend("task_success", -1, "none", "dr")
+
+    assert table.recommend("task_success", 3, "prompt_risk", "naive") == recommend_policy(
+        payload, "task_success", 3, "prompt_risk", "naive"
+    )
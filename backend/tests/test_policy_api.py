@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import json
 import time
 
 from fastapi.testclient import TestClient
 
+from app.api.schemas import RecommendBatchResponse, RecommendResponse
 from app.core.cache import artifact_cache, response_cache
 from app.core.config import get_settings
+from app.core.executor import ColdComputeExecutor
 from app.main import create_app
 from app.ml.train import build_artifacts
 
@@ -71,3 +74,204 @@ def test_recommendation_latency_with_precomputed_artifacts(tmp_path) -> None:
 
     assert response.status_code == 200
     assert elapsed_seconds < 0.30, f"Soft latency budget exceeded: {elapsed_seconds:.3f}s"
+
+
+def test_startup_precomputes_every_recommendation_before_ready(tmp_path) -> None:
+    client = _build_test_client(tmp_path)
+    assert client.get("/readyz").status_code == 503
+
+    with client:
+        assert client.get("/readyz").json() == {"status": "ready"}
+        assert len(response_cache) == 2 * 5 * 4 * 2
+        hits_before = response_cache.stats()["hits"]
+
+        response = client.post(
+            "/api/v1/recommend",
+            json={"objective": "task_success", "max_policy_level": 4, "segment_by": "task_domain", "method": "naive"},
+        )
+
+    assert response.status_code == 200
+    assert len(response_cache) == 2 * 5 * 4 * 2
+    assert response_cache.stats()["hits"] == hits_before + 1
+
+    # Only the serialized forms are cached, so `max_bytes` counts what an entry holds.
+    entry = response_cache.get(
+        ("task_success", 4, "task_domain", "naive"), scope=artifact_cache.current().manifest["artifact_hash"]
+    )
+    assert set(entry) == {"body_prefix", "warnings", "encoded_prefixes"}
+
+
+def test_cached_response_bytes_splice_request_id(tmp_path) -> None:
+    client = _build_test_client(tmp_path)
+    payload = {"objective": "safe_value", "max_policy_level": 2, "segment_by": "device_tier", "method": "dr"}
+
+    first = client.post("/api/v1/recommend", json=payload, headers={"X-Request-Id": "req-1"})
+    second = client.post("/api/v1/recommend", json=payload, headers={"X-Request-Id": 'req-"2"'})
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["content-type"] == "application/json"
+    assert first.json()["request_id"] == "req-1"
+    assert second.json()["request_id"] == 'req-"2"'
+    assert RecommendResponse.model_validate(second.json()).model_dump(exclude={"request_id"}) == (
+        RecommendResponse.model_validate(first.json()).model_dump(exclude={"request_id"})
+    )
+
+
+def test_cache_hits_skip_the_cold_executor(tmp_path) -> None:
+    client = _build_test_client(tmp_path)
+    payload = {"objective": "task_success", "max_policy_level": 3, "segment_by": "prompt_risk", "method": "dr"}
+
+    with client:
+        saturated = ColdComputeExecutor(max_workers=1, max_pending=1)
+        saturated.pending = 1
+        client.app.state.cold_executor = saturated
+
+        assert client.post("/api/v1/recommend", json=payload).status_code == 200
+
+        response_cache.clear()
+        response = client.post("/api/v1/recommend", json=payload)
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+        saturated.pending = 0
+        assert client.post("/api/v1/recommend", json=payload).status_code == 200
+
+
+def test_batch_matches_single_calls_and_dedupes(tmp_path) -> None:
+    client = _build_test_client(tmp_path)
+    first = {"objective": "task_success", "max_policy_level": 3, "segment_by": "prompt_risk", "method": "dr"}
+    second = {"objective": "safe_value", "max_policy_level": 1, "segment_by": "none", "method": "naive"}
+
+    hits_before = response_cache.stats()["hits"]
+    response = client.post(
+        "/api/v1/recommend:batch",
+        json={"requests": [first, second, first]},
+        headers={"X-Request-Id": "batch-1"},
+    )
+
+    assert response.status_code == 200
+    body = RecommendBatchResponse.model_validate(response.json())
+    assert body.request_id == "batch-1"
+    assert [item.request_id for item in body.responses] == ["batch-1"] * 3
+    assert body.responses[0] == body.responses[2]
+    assert response_cache.stats()["hits"] == hits_before + 2
+
+    single = client.post("/api/v1/recommend", json=second)
+    assert RecommendResponse.model_validate(single.json()).model_dump(exclude={"request_id"}) == (
+        body.responses[1].model_dump(exclude={"request_id"})
+    )
+
+    assert client.post("/api/v1/recommend:batch", json={"requests": []}).status_code == 422
+    assert client.post("/api/v1/recommend:batch", json={"requests": [first] * 101}).status_code == 422
+
+
+def test_recommendation_grid_etag_and_gzip(tmp_path) -> None:
+    client = _build_test_client(tmp_path)
+
+    response = client.get("/api/v1/recommendations/grid", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    etag = response.headers["etag"]
+    assert etag == f'"{artifact_cache.current().manifest["artifact_hash"]}"'
+
+    bundle = response.json()
+    assert len(bundle["recommendations"]) == 2 * 5 * 4 * 2
+    single = client.post(
+        "/api/v1/recommend",
+        json={"objective": "safe_value", "max_policy_level": 2, "segment_by": "device_tier", "method": "dr"},
+    ).json()
+    grid_entry = bundle["recommendations"]["safe_value|2|device_tier|dr"]
+    assert grid_entry["segments"] == single["segments"]
+    assert grid_entry["method_used"] == single["method_used"]
+
+    raw = client.get("/api/v1/recommendations/grid", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+    assert json.loads(raw.content) == bundle
+
+    not_modified = client.get("/api/v1/recommendations/grid", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not_modified.content == b""
+
+    stale = client.get("/api/v1/recommendations/grid", headers={"If-None-Match": '"stale"'})
+    assert stale.status_code == 200
+
+
+def test_recommendation_grid_falls_back_to_naive_without_dr_artifacts(tmp_path) -> None:
+    client = _build_test_client(tmp_path)
+    manifest_path = tmp_path / "artifacts" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    manifest.update(has_dr=False, artifact_hash="no-dr")
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    artifact_cache.clear()
+
+    with client:
+        grid_entry = client.get("/api/v1/recommendations/grid").json()["recommendations"]["safe_value|2|device_tier|dr"]
+        # The fallback body is warmed under the requested method, so this is a cache hit.
+        assert len(response_cache) == 2 * 5 * 4 * 2
+        hits_before = response_cache.stats()["hits"]
+        single = client.post(
+            "/api/v1/recommend",
+            json={"objective": "safe_value", "max_policy_level": 2, "segment_by": "device_tier", "method": "dr"},
+        ).json()
+        assert response_cache.stats()["hits"] == hits_before + 1
+
+    assert grid_entry["method_used"] == single["method_used"] == "naive"
+    assert single["warnings"] == ["DR artifacts unavailable; falling back to naive policy"]
+    assert grid_entry["warnings"] == single["warnings"]
+    assert grid_entry["segments"] == single["segments"]
+
+
+def test_recommend_serves_precompressed_bodies_and_middleware_compresses_the_rest(tmp_path) -> None:
+    client = _build_test_client(tmp_path)
+    payload = {"objective": "task_success", "max_policy_level": 4, "segment_by": "task_domain", "method": "dr"}
+
+    raw = client.post("/api/v1/recommend", json=payload, headers={"Accept-Encoding": "identity", "X-Request-Id": "r-1"})
+    encoded = client.post("/api/v1/recommend", json=payload, headers={"Accept-Encoding": "gzip", "X-Request-Id": "r-1"})
+
+    assert "content-encoding" not in raw.headers
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.headers["vary"] == "Accept-Encoding"
+    assert int(encoded.headers["content-length"]) < len(raw.content)
+    assert encoded.content == raw.content
+
+    batch = client.post("/api/v1/recommend:batch", json={"requests": [payload] * 5}, headers={"Accept-Encoding": "gzip"})
+    assert batch.headers["content-encoding"] == "gzip"
+    assert len(batch.json()["responses"]) == 5
+
+    metadata = client.get("/api/v1/metadata", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in metadata.headers
+
+
+def test_metrics_endpoint_exposes_latency_cache_and_artifact_series(tmp_path) -> None:
+    client = _build_test_client(tmp_path)
+    payload = {"objective": "safe_value", "max_policy_level": 3, "segment_by": "none", "method": "naive"}
+
+    with client:
+        response_cache.clear()
+        assert client.post("/api/v1/recommend", json=payload).status_code == 200
+        assert client.post("/api/v1/recommend", json=payload).status_code == 200
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+
+    route = 'method="POST",route="/api/v1/recommend"'
+    assert samples[f'edgealign_http_request_duration_seconds_bucket{{{route},le="+Inf"}}'] >= 2
+    assert samples[f'edgealign_http_request_duration_seconds_count{{{route}}}'] >= 2
+    assert samples[f'edgealign_http_requests_total{{{route},status_code="200"}}'] >= 2
+    assert samples['edgealign_cold_compute_duration_seconds_count{operation="compute_entry"}'] >= 1
+    assert samples["edgealign_response_cache_hits_total"] >= 1
+    assert samples["edgealign_response_cache_misses_total"] >= 1
+    assert samples["edgealign_response_cache_entries"] == 1
+    assert samples['edgealign_artifact_load_duration_seconds{stage="manifest"}'] >= 0
+    assert any(name.startswith("edgealign_artifact_info{") and 'artifact_version="test-api"' in name for name in samples)
+    assert samples["edgealign_cold_compute_pending"] == 0
+    assert "edgealign_threadpool_tasks_waiting" in samples
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+
+from fastapi.testclient import TestClient
+
+from app.api.schemas import recommend_key
+from app.core.cache import ArtifactCache, artifact_cache, response_cache
+from app.core.config import get_settings
+from app.core.reload import ArtifactReloader
+from app.main import create_app
+from app.ml.train import build_artifacts
+
+
+def test_reloader_swaps_changed_artifacts_and_keeps_bundle_on_failure(tmp_path) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=1, artifact_version="v1")
+    cache = ArtifactCache()
+    reloader = ArtifactReloader(cache, artifact_dir, interval_seconds=0)
+    first = cache.get(artifact_dir)
+
+    assert not reloader.check()
+
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=2, artifact_version="v2")
+    assert reloader.check()
+    second = cache.current()
+    assert second.manifest["artifact_version"] == "v2"
+    assert second.manifest["artifact_hash"] != first.manifest["artifact_hash"]
+
+    (artifact_dir / "manifest.json").write_text("{not json", encoding="utf-8")
+    assert not reloader.check()
+    assert cache.current() is second
+
+
+def test_admin_reload_requires_token_and_serves_new_artifacts(tmp_path, monkeypatch) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=1, artifact_version="v1")
+    os.environ["ARTIFACT_DIR"] = str(artifact_dir)
+    monkeypatch.setenv("APP_ENV", "dev")
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    monkeypatch.setenv("ARTIFACT_RELOAD_INTERVAL_SECONDS", "0")
+    get_settings.cache_clear()
+    artifact_cache.clear()
+    response_cache.clear()
+
+    try:
+        with TestClient(create_app()) as client:
+            assert client.get("/api/v1/metadata").json()["artifact_version"] == "v1"
+            build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=2, artifact_version="v2")
+
+            assert client.post("/api/v1/admin/reload").status_code == 401
+            response = client.post("/api/v1/admin/reload", headers={"X-Admin-Token": "s3cret"})
+
+            assert response.status_code == 200
+            assert response.json()["artifact_version"] == "v2"
+            assert client.get("/readyz").status_code == 200
+            assert client.get("/api/v1/metadata").json()["artifact_version"] == "v2"
+            assert response_cache.stats()["entries"] == 2 * 5 * 4 * 2
+    finally:
+        get_settings.cache_clear()
+
+
+def test_served_bundle_keeps_cache_hits_while_a_reload_warms(tmp_path) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=1, artifact_version="v1")
+    os.environ["ARTIFACT_DIR"] = str(artifact_dir)
+    get_settings.cache_clear()
+    artifact_cache.clear()
+    response_cache.clear()
+    key = recommend_key("task_success", 3, "prompt_risk", "dr")
+    payload = {"objective": "task_success", "max_policy_level": 3, "segment_by": "prompt_risk", "method": "dr"}
+    during_reload = []
+
+    def probe(bundle) -> None:
+        served = artifact_cache.current()
+        during_reload.append(
+            (
+                served.manifest["artifact_version"],
+                response_cache.get(key, scope=served.manifest["artifact_hash"]) is not None,
+                response_cache.contains(key, scope=bundle.manifest["artifact_hash"]),
+            )
+        )
+
+    try:
+        with TestClient(create_app()) as client:
+            artifact_cache.add_load_hook(probe)
+            build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=2, artifact_version="v2")
+            artifact_cache.reload(artifact_dir)
+
+            assert during_reload == [("v1", True, True)]
+            v2_hash = artifact_cache.current().manifest["artifact_hash"]
+            assert client.post("/api/v1/recommend", json=payload).json()["artifact_version"] == "v2"
+            assert response_cache.stats()["entries"] == 2 * 5 * 4 * 2
+            assert response_cache.contains(key, scope=v2_hash)
+    finally:
+        artifact_cache._load_hooks.remove(probe)
+        get_settings.cache_clear()
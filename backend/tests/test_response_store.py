@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.testclient import TestClient
+
+from app.core.cache import artifact_cache, response_cache
+from app.core.compression import encode_prefix
+from app.core.config import get_settings
+from app.core.response_store import STORE_FORMAT_VERSION, SharedResponseStore, response_store
+from app.main import create_app
+from app.ml.train import build_artifacts
+
+
+def _entries():
+    return [
+        (("task_success", 2, "none", "dr"), {"body_prefix": b'{"a":1,"request_id":', "warnings": []}),
+        (("safe_value", 4, "device_tier", "naive"), {"body_prefix": b'{"b":2,"request_id":', "warnings": ["w"]}),
+    ]
+
+
+def test_first_worker_builds_store_and_others_attach_read_only(tmp_path) -> None:
+    builds = []
+    start = threading.Barrier(4)
+
+    def worker() -> SharedResponseStore:
+        store = SharedResponseStore(tmp_path)
+        start.wait()
+        store.attach("hash-a", lambda: builds.append(1) or _entries())
+        return store
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        stores = list(pool.map(lambda _: worker(), range(4)))
+
+    assert len(builds) == 1
+    for store in stores:
+        assert len(store) == 2
+        assert store.get(("task_success", 2, "none", "dr"), scope="hash-a")["body_prefix"] == b'{"a":1,"request_id":'
+        assert store.get(("safe_value", 4, "device_tier", "naive"), scope="hash-a")["warnings"] == ["w"]
+        assert store.get(("task_success", 2, "none", "dr"), scope="hash-b") is None
+
+    assert stores[0].attach("hash-b", _entries) == 2
+    assert sorted(path.name for path in tmp_path.glob("responses-*.bin")) == [
+        f"responses-v{STORE_FORMAT_VERSION}-hash-b.bin"
+    ]
+    assert stores[1].get(("task_success", 2, "none", "dr"), scope="hash-a") is not None
+
+
+def test_store_rebuilds_files_it_cannot_read(tmp_path) -> None:
+    # A store from before encoded prefixes were kept, under its old name and the current one.
+    index = json.dumps({"format_version": 1, "scope": "hash-a", "entries": [[["k"], 0, 3, []]]}).encode("utf-8")
+    legacy = struct.pack("<Q", len(index)) + index + b"old"
+    current = tmp_path / f"responses-v{STORE_FORMAT_VERSION}-hash-a.bin"
+    (tmp_path / "responses-hash-a.bin").write_bytes(legacy)
+    current.write_bytes(legacy)
+
+    store = SharedResponseStore(tmp_path)
+    assert store.attach("hash-a", _entries) == 2
+    assert store.get(("task_success", 2, "none", "dr"), scope="hash-a")["body_prefix"] == b'{"a":1,"request_id":'
+    assert sorted(path.name for path in tmp_path.glob("responses-*.bin")) == [current.name]
+
+    current.unlink()
+    current.write_bytes(b"")
+    assert SharedResponseStore(tmp_path).attach("hash-a", _entries) == 2
+    assert SharedResponseStore(tmp_path).attach("hash-a", _entries) == 0
+
+
+def test_store_keeps_encoded_variants_next_to_raw_bytes(tmp_path) -> None:
+    prefix = b'{"a":' + b"[1,2,3]," * 50 + b'"request_id":'
+    store = SharedResponseStore(tmp_path)
+    store.attach("hash-a", lambda: [(("k",), {"body_prefix": prefix, "warnings": [], "encoded_prefixes": encode_prefix(prefix)})])
+
+    entry = store.get(("k",), scope="hash-a")
+
+    assert entry["body_prefix"] == prefix
+    assert isinstance(entry["body_prefix"], memoryview)
+    assert store.get(("k",), scope="hash-a") is entry
+    assert gzip.decompress(entry["encoded_prefixes"]["gzip"].render(b"null}")) == prefix + b"null}"
+
+
+def test_recommend_serves_from_shared_store(tmp_path) -> None:
+    artifact_dir = tmp_path / "artifacts"
+    build_artifacts(artifact_dir=artifact_dir, rows=4_000, seed=6, artifact_version="shared")
+    os.environ["ARTIFACT_DIR"] = str(artifact_dir)
+    os.environ["APP_ENV"] = "dev"
+    os.environ["RESPONSE_STORE_DIR"] = str(tmp_path / "store")
+    get_settings.cache_clear()
+    artifact_cache.clear()
+    response_cache.clear()
+
+    try:
+        with TestClient(create_app()) as client:
+            response = client.post(
+                "/api/v1/recommend",
+                json={"objective": "safe_value", "max_policy_level": 3, "segment_by": "prompt_risk", "method": "dr"},
+                headers={"X-Request-Id": "shared-1"},
+            )
+
+        assert response.status_code == 200
+        assert response.json()["request_id"] == "shared-1"
+        assert len(response_store) == 2 * 5 * 4 * 2
+        assert len(response_cache) == 0
+    finally:
+        del os.environ["RESPONSE_STORE_DIR"]
+        get_settings.cache_clear()
+        response_store.configure(None)
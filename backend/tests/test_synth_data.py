@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.data_schema import TREATMENT_COL
+from app.ml.synth_data import (
+    SYNTH_BLOCK_ROWS,
+    _sample_levels_legacy,
+    _sample_levels_vectorized,
+    generate_synthetic_data,
+    iter_synthetic_chunks,
+    read_synthetic_parquet,
+    write_synthetic_parquet,
+)
+
+
+def test_vectorized_sampler_matches_assignment_probabilities() -> None:
+    rng = np.random.default_rng(5)
+    probs = np.tile(np.array([0.1, 0.2, 0.3, 0.4]), (200_000, 1))
+
+    sampled = _sample_levels_vectorized(rng, probs)
+
+    frequencies = np.bincount(sampled, minlength=4) / sampled.size
+    np.testing.assert_allclose(frequencies, probs[0], atol=0.005)
+
+
+def test_legacy_sampler_reproduces_per_row_choice() -> None:
+    probs = np.random.default_rng(3).dirichlet(np.ones(5), size=300)
+    reference_rng = np.random.default_rng(11)
+    expected = np.array([reference_rng.choice(5, p=row) for row in probs])
+
+    np.testing.assert_array_equal(_sample_levels_legacy(np.random.default_rng(11), probs), expected)
+
+
+def test_generate_synthetic_data_rejects_unknown_sampler() -> None:
+    with pytest.raises(ValueError, match="Unknown sampler"):
+        generate_synthetic_data(n_rows=10, sampler="fast")
+
+
+def test_generate_synthetic_data_is_deterministic_per_sampler() -> None:
+    for sampler in ("vectorized", "legacy"):
+        df_a = generate_synthetic_data(n_rows=500, seed=2, sampler=sampler)
+        df_b = generate_synthetic_data(n_rows=500, seed=2, sampler=sampler)
+        assert df_a.equals(df_b)
+        assert set(df_a[TREATMENT_COL].unique()) <= {0, 1, 2, 3, 4}
+
+
+def test_chunked_output_is_independent_of_chunk_size() -> None:
+    n_rows = SYNTH_BLOCK_ROWS + 1_234
+    reference = pd.concat(iter_synthetic_chunks(n_rows=n_rows, chunk_rows=n_rows, seed=8), ignore_index=True)
+
+    for chunk_rows in (5_000, SYNTH_BLOCK_ROWS, 70_001):
+        chunks = list(iter_synthetic_chunks(n_rows=n_rows, chunk_rows=chunk_rows, seed=8))
+        assert all(len(chunk) <= chunk_rows for chunk in chunks)
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), reference)
+
+
+def test_parquet_writer_streams_partitioned_dataset(tmp_path) -> None:
+    n_rows = 9_000
+    part_paths = write_synthetic_parquet(
+        output_dir=tmp_path / "demo",
+        n_rows=n_rows,
+        seed=8,
+        chunk_rows=2_000,
+        part_rows=4_000,
+    )
+
+    assert [path.name for path in part_paths] == [
+        "part-00000.parquet",
+        "part-00001.parquet",
+        "part-00002.parquet",
+    ]
+    expected = pd.concat(iter_synthetic_chunks(n_rows=n_rows, seed=8), ignore_index=True)
+    pd.testing.assert_frame_equal(read_synthetic_parquet(part_paths), expected)
+
+
+def test_parallel_parquet_parts_are_byte_identical_to_serial(tmp_path) -> None:
+    options = dict(n_rows=7_000, seed=21, chunk_rows=1_500, part_rows=2_500)
+    serial_parts = write_synthetic_parquet(output_dir=tmp_path / "serial", workers=1, **options)
+    parallel_parts = write_synthetic_parquet(output_dir=tmp_path / "parallel", workers=3, **options)
+
+    assert [path.name for path in serial_parts] == [path.name for path in parallel_parts]
+    for serial_path, parallel_path in zip(serial_parts, parallel_parts):
+        assert serial_path.read_bytes() == parallel_path.read_bytes()